@@ -0,0 +1,47 @@
+"""Offline benchmarks of the dabert API
+
+Run a benchmark from the project directory, for example:
+
+    python -m benchmarks.login --requests 50
+"""
+import contextlib
+import os
+
+import django
+
+
+def setup():
+    """Configure Django for a standalone benchmark script"""
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dabert.settings')
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database(verbosity=0, name=None):
+    """Run the benchmark against a throwaway test database
+
+    On SQLite the test database is in memory unless a file name is given,
+    which concurrent writers need. The rate limits are off, the benchmark
+    clients all share one address and would be refused with 429.
+    """
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import override_settings, \
+        setup_test_environment, teardown_test_environment
+
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True
+    )
+    try:
+        with override_settings(THROTTLING=dict(settings.THROTTLING,
+                                               RATES={})):
+            yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
@@ -0,0 +1,116 @@
+"""Concurrent write load test of the configured database
+
+Writer threads each create users and send them notifications, the way
+concurrent signups and notifications hit the database from several uWSGI
+workers. SQLite is measured on a temporary file once in rollback journal
+mode and once in WAL mode, PostgreSQL (DATABASE_ENGINE=postgresql) on a
+throwaway test database.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup, test_database
+
+
+def write(worker, writes, failures):
+    """Create users and notifications from one writer thread"""
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction, OperationalError
+    from core.models import Notification
+
+    User = get_user_model()
+    previous = None
+    try:
+        for i in range(writes):
+            try:
+                with transaction.atomic():
+                    user = User.objects.create(
+                        car_id='bench-{}-{}'.format(worker, i),
+                        email='bench-{}-{}@email.com'.format(worker, i),
+                        phone_number='{:04d}{:06d}'.format(worker, i)
+                    )
+                    if previous is not None:
+                        Notification.objects.create(
+                            from_user=previous, to_user=user, notification=1
+                        )
+                previous = user
+            except OperationalError as exc:
+                failures.append(str(exc))
+    finally:
+        connection.close()
+
+
+def run(threads, writes):
+    """Return the elapsed seconds and failures of one load run"""
+
+    failures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for worker in range(threads):
+            executor.submit(write, worker, writes, failures)
+
+    return time.perf_counter() - start, failures
+
+
+def report(label, threads, writes, elapsed, failures):
+    succeeded = threads * writes - len(failures)
+    print('{:<10} {:>8} {:>10.1f} {:>10}  {}'.format(
+        label,
+        threads,
+        succeeded / elapsed,
+        len(failures),
+        sorted(set(failures))[:1] or ''
+    ))
+
+
+def run_sqlite(threads, writes, wal):
+    """Run the load on a fresh SQLite file in the given journal mode"""
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+
+    settings.SQLITE_WAL = wal
+    with tempfile.TemporaryDirectory() as directory:
+        connection = connections['default']
+        connection.close()
+        connection.settings_dict['NAME'] = os.path.join(directory, 'load.db')
+
+        call_command('migrate', verbosity=0)
+        connection.close()
+
+        return run(threads, writes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16],
+                        help='concurrent writers of every run')
+    parser.add_argument('--writes', type=int, default=100,
+                        help='transactions of every writer')
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+
+    print('{:<10} {:>8} {:>10} {:>10}'.format(
+        'mode', 'threads', 'writes/s', 'failures'
+    ))
+    for threads in args.threads:
+        if connection.vendor == 'sqlite':
+            for label, wal in (('rollback', False), ('wal', True)):
+                elapsed, failures = run_sqlite(threads, args.writes, wal)
+                report(label, threads, args.writes, elapsed, failures)
+        else:
+            with test_database():
+                elapsed, failures = run(threads, args.writes)
+            report(connection.vendor, threads, args.writes, elapsed,
+                   failures)
+
+
+if __name__ == '__main__':
+    main()
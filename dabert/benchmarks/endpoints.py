@@ -0,0 +1,307 @@
+"""Throughput and latency of the user endpoints
+
+Measures user:create, user:token and user:me at the given concurrency,
+either in process with the Django test client against a throwaway
+database (the default, which also records the queries per request) or
+against a running server given by --url. Results are saved as JSON with
+--output, and --baseline compares them to a previous run, exiting with
+status 1 when an endpoint regressed by more than --threshold.
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup, test_database
+
+
+ENDPOINTS = ('create', 'token', 'me')
+
+PASSWORD = 'benchmark-password'
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of a list of values"""
+
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+class ClientTarget:
+    """Sends the requests through the Django test client"""
+
+    def __init__(self):
+        from django.urls import reverse
+
+        self.urls = {name: reverse('user:' + name) for name in ENDPOINTS}
+        self.local = threading.local()
+
+    @property
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            from rest_framework.test import APIClient
+            self.local.client = APIClient()
+        return self.local.client
+
+    def request(self, method, name, data=None, token=None):
+        headers = {}
+        if token:
+            headers['HTTP_AUTHORIZATION'] = 'Token {}'.format(token)
+
+        send = getattr(self.client, method.lower())
+        res = send(self.urls[name], data, format='json', **headers)
+        return res.status_code, res.json() if res.content else None
+
+    def count_queries(self, method, name, data=None, token=None):
+        """Return the queries run by a single request"""
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self.request(method, name, data, token)
+        return len(queries)
+
+    def close(self):
+        from django.db import connection
+        connection.close()
+
+
+class HttpTarget:
+    """Sends the requests to a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.paths = {
+            'create': '/api/user/create/',
+            'token': '/api/user/token/',
+            'me': '/api/user/me/',
+        }
+
+    def request(self, method, name, data=None, token=None):
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(
+            self.base_url + self.paths[name], data=body, method=method,
+            headers={'Content-Type': 'application/json',
+                     'Accept': 'application/json'}
+        )
+        if token:
+            request.add_header('Authorization', 'Token {}'.format(token))
+
+        try:
+            with urllib.request.urlopen(request, timeout=30) as res:
+                return res.status, json.loads(res.read() or b'null')
+        except urllib.error.HTTPError as exc:
+            return exc.code, None
+
+    def count_queries(self, *args, **kwargs):
+        # Not observable from outside the server
+        return None
+
+    def close(self):
+        pass
+
+
+class Benchmark:
+    """Runs every endpoint against a target"""
+
+    def __init__(self, target, requests, concurrency):
+        self.target = target
+        self.requests = requests
+        self.concurrency = concurrency
+        # Unique user fields across the whole run
+        self.counter = itertools.count()
+        self.run_id = '{:x}'.format(int(time.time() * 1000) % 0xffffff)
+
+    def new_user_payload(self):
+        i = next(self.counter)
+        return {
+            'car_id': 'bench-{}-{}'.format(self.run_id, i),
+            'email': 'bench-{}-{}@email.com'.format(self.run_id, i),
+            'phone_number': '9{:09d}'.format(
+                (int(self.run_id, 16) * 1000 + i) % 10 ** 9
+            ),
+            'password': PASSWORD,
+        }
+
+    def prepare(self):
+        """Create the user and token the token and me endpoints use"""
+
+        payload = self.new_user_payload()
+        status, _ = self.target.request('POST', 'create', payload)
+        if status != 201:
+            raise RuntimeError('Could not create the benchmark user')
+
+        status, data = self.target.request('POST', 'token', {
+            'car_id': payload['car_id'], 'password': PASSWORD
+        })
+        if status != 200:
+            raise RuntimeError('Could not log in the benchmark user')
+
+        self.login = {'car_id': payload['car_id'], 'password': PASSWORD}
+        self.token = data['token']
+
+    def call(self, name):
+        """Send one request to an endpoint, return its expected status"""
+
+        if name == 'create':
+            return self.target.request(
+                'POST', name, self.new_user_payload()
+            )[0] == 201
+        if name == 'token':
+            return self.target.request('POST', name, self.login)[0] == 200
+        return self.target.request('GET', name, token=self.token)[0] == 200
+
+    def timed_call(self, name):
+        start = time.perf_counter()
+        try:
+            ok = self.call(name)
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    def run_endpoint(self, name):
+        """Return the measurements of one endpoint"""
+
+        def worker(count):
+            try:
+                return [self.timed_call(name) for _ in range(count)]
+            finally:
+                self.target.close()
+
+        shares = [
+            self.requests // self.concurrency +
+            (1 if i < self.requests % self.concurrency else 0)
+            for i in range(self.concurrency)
+        ]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = [
+                result
+                for results in executor.map(worker, shares)
+                for result in results
+            ]
+        elapsed = time.perf_counter() - start
+
+        latencies = [seconds for seconds, ok in results]
+        if name == 'create':
+            queries = self.target.count_queries(
+                'POST', name, self.new_user_payload()
+            )
+        elif name == 'token':
+            queries = self.target.count_queries('POST', name, self.login)
+        else:
+            queries = self.target.count_queries('GET', name,
+                                                token=self.token)
+
+        return {
+            'requests': len(results),
+            'errors': sum(1 for seconds, ok in results if not ok),
+            'throughput': len(results) / elapsed,
+            'mean_ms': statistics.mean(latencies) * 1000,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'queries': queries,
+        }
+
+    def run(self, endpoints):
+        self.prepare()
+        return {name: self.run_endpoint(name) for name in endpoints}
+
+
+def compare(results, baseline, threshold):
+    """Return the regressions of results against a baseline run"""
+
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+
+        if current['throughput'] < previous['throughput'] * (1 - threshold):
+            regressions.append('{}: throughput {:.1f} -> {:.1f} req/s'.format(
+                name, previous['throughput'], current['throughput']
+            ))
+        if current['p99_ms'] > previous['p99_ms'] * (1 + threshold):
+            regressions.append('{}: p99 {:.2f} -> {:.2f} ms'.format(
+                name, previous['p99_ms'], current['p99_ms']
+            ))
+        if None not in (current['queries'], previous['queries']) and \
+                current['queries'] > previous['queries']:
+            regressions.append('{}: queries {} -> {}'.format(
+                name, previous['queries'], current['queries']
+            ))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='base URL of a running server, by '
+                                      'default the test client is used')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests sent to every endpoint')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='concurrent clients')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS,
+                        default=list(ENDPOINTS))
+    parser.add_argument('--output', help='file to save the results to')
+    parser.add_argument('--baseline', help='results of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change reported as a regression')
+    args = parser.parse_args()
+
+    if args.url:
+        results = Benchmark(
+            HttpTarget(args.url), args.requests, args.concurrency
+        ).run(args.endpoints)
+    else:
+        setup()
+        with tempfile.TemporaryDirectory() as directory, \
+                test_database(name=os.path.join(directory, 'bench.db')):
+            results = Benchmark(
+                ClientTarget(), args.requests, args.concurrency
+            ).run(args.endpoints)
+
+    results = {
+        'target': args.url or 'test-client',
+        'concurrency': args.concurrency,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'endpoints': results,
+    }
+
+    print('{:<8} {:>10} {:>9} {:>9} {:>9} {:>8} {:>7}'.format(
+        'endpoint', 'req/s', 'mean ms', 'p50 ms', 'p99 ms', 'queries',
+        'errors'
+    ))
+    for name, result in results['endpoints'].items():
+        print('{:<8} {:>10.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>8} {:>7}'.format(
+            name, result['throughput'], result['mean_ms'], result['p50_ms'],
+            result['p99_ms'], str(result['queries']), result['errors']
+        ))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print('REGRESSION {}'.format(regression))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
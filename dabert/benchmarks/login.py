@@ -0,0 +1,86 @@
+"""Login throughput of the token endpoint for each password hasher
+
+Every hasher is measured through POST /api/user/token/ with the Django
+test client, so the numbers include the full authentication path. Pass
+cost parameters through the usual environment variables, e.g.
+PASSWORD_HASH_ITERATIONS=60000 python -m benchmarks.login
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import setup, test_database
+
+
+def measure(hasher_path, requests):
+    """Return the login latencies in seconds with the given hasher"""
+
+    from django.contrib.auth import get_user_model
+    from django.test import Client, override_settings
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+
+    with override_settings(PASSWORD_HASHERS=[hasher_path]):
+        user = get_user_model().objects.create_user(
+            car_id="bench-login",
+            email="bench-login@email.com",
+            phone_number="0500000000",
+            password="password"
+        )
+
+        client = Client()
+        url = reverse('user:token')
+        payload = {'car_id': user.car_id, 'password': "password"}
+
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            res = client.post(url, payload)
+            latencies.append(time.perf_counter() - start)
+
+            if res.status_code != 200:
+                raise RuntimeError('Login failed: {}'.format(res.content))
+
+    Token.objects.all().delete()
+    user.delete()
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20,
+                        help='logins measured for every hasher')
+    parser.add_argument('--hashers', nargs='+',
+                        help='hasher names of PASSWORD_HASHER_CLASSES')
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+
+    names = args.hashers or list(settings.PASSWORD_HASHER_CLASSES)
+
+    print('{:<10} {:>10} {:>10} {:>10}'.format(
+        'hasher', 'logins/s', 'mean ms', 'max ms'
+    ))
+    with test_database():
+        for name in names:
+            try:
+                latencies = measure(
+                    settings.PASSWORD_HASHER_CLASSES[name], args.requests
+                )
+            except ValueError as exc:
+                # The hasher library is not installed
+                print('{:<10} skipped: {}'.format(name, exc))
+                continue
+
+            print('{:<10} {:>10.1f} {:>10.2f} {:>10.2f}'.format(
+                name,
+                len(latencies) / sum(latencies),
+                statistics.mean(latencies) * 1000,
+                max(latencies) * 1000
+            ))
+
+
+if __name__ == '__main__':
+    main()
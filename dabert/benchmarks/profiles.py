@@ -0,0 +1,99 @@
+"""Startup time and per request overhead of the settings profiles
+
+Every profile runs in fresh processes: the startup time is the time to
+import and configure Django and create the WSGI application, the per
+request overhead the latency of an unauthenticated GET of the
+notification list through the whole middleware and DRF stack, which
+answers 401 without touching the database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+PROFILES = {
+    'full': {'API_ONLY': '0'},
+    'api-only': {'API_ONLY': '1'},
+}
+
+PATH = '/api/notifications/'
+
+
+def child(requests):
+    """Measure this process and print the results as JSON"""
+
+    start = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dabert.settings')
+    from dabert.wsgi import application  # noqa: F401
+    startup = time.perf_counter() - start
+
+    from django.conf import settings
+    from django.test import Client
+
+    client = Client(HTTP_HOST='127.0.0.1')
+    timings = []
+    for _ in range(requests):
+        request_start = time.perf_counter()
+        response = client.get(PATH)
+        timings.append(time.perf_counter() - request_start)
+    assert response.status_code == 401, response.status_code
+
+    print(json.dumps({
+        'startup': startup,
+        # The first request also pays for anything left lazy
+        'first': timings[0],
+        'request': statistics.median(timings[1:]),
+        'apps': len(settings.INSTALLED_APPS),
+        'middleware': len(settings.MIDDLEWARE),
+    }))
+
+
+def run(profile, requests):
+    """Return the measurements of one process running a profile"""
+
+    env = dict(os.environ, **PROFILES[profile])
+    output = subprocess.check_output(
+        [sys.executable, '-W', 'ignore', '-m', 'benchmarks.profiles',
+         '--child', '--requests', str(requests)],
+        env=env
+    )
+    return json.loads(output.decode().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=5,
+                        help='processes started for every profile')
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests sent by every process')
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.requests)
+        return
+
+    print('{:<9} {:>5} {:>11} {:>11} {:>10} {:>10}'.format(
+        'profile', 'apps', 'middleware', 'startup ms', 'first ms',
+        'request us'
+    ))
+    for profile in PROFILES:
+        results = [run(profile, args.requests)
+                   for _ in range(args.processes)]
+        print('{:<9} {:>5} {:>11} {:>11.1f} {:>10.2f} {:>10.1f}'.format(
+            profile,
+            results[0]['apps'],
+            results[0]['middleware'],
+            statistics.median(r['startup'] for r in results) * 1000,
+            statistics.median(r['first'] for r in results) * 1000,
+            statistics.median(r['request'] for r in results) * 1000000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Serialization cost of a notification list page
+
+Compares the DRF path of the notification list endpoints, model instances
+through NotificationSerializer rendered by JSONRenderer, with the
+.values() rows through NotificationRowSerializer rendered by
+FastJSONRenderer (orjson when installed). The rows are fetched once, only
+serialization and rendering are timed.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import setup, test_database
+
+
+def create_notifications(count):
+    """Create count notifications between two users"""
+
+    from django.contrib.auth import get_user_model
+    from core.models import Notification
+
+    User = get_user_model()
+    sender = User.objects.create(car_id='bench-sender',
+                                 email='sender@email.com',
+                                 phone_number='0500000001')
+    recipient = User.objects.create(car_id='bench-recipient',
+                                    email='recipient@email.com',
+                                    phone_number='0500000002')
+    Notification.objects.bulk_create(
+        Notification(from_user=sender, to_user=recipient, notification=i)
+        for i in range(count)
+    )
+
+
+def measure(function, repeat):
+    """Return the per call seconds of a function"""
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--page-size', type=int, default=100,
+                        help='notifications in the serialized page')
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='timed serializations of every path')
+    args = parser.parse_args()
+
+    setup()
+    from rest_framework.renderers import JSONRenderer
+    from core import renderers
+    from core.models import Notification
+    from notifications.serializers import NotificationSerializer, \
+        NotificationRowSerializer
+
+    with test_database():
+        create_notifications(args.page_size)
+        queryset = Notification.objects.select_related('from_user',
+                                                       'to_user')
+        instances = list(queryset)
+        rows = list(NotificationRowSerializer.values(queryset))
+
+    paths = {
+        'drf': lambda: JSONRenderer().render(
+            NotificationSerializer(instances, many=True).data
+        ),
+        'rows': lambda: renderers.FastJSONRenderer().render(
+            NotificationRowSerializer(rows).data
+        ),
+    }
+
+    print('orjson {}'.format('installed' if renderers.orjson else 'missing'))
+    print('{:<6} {:>10} {:>10} {:>10}'.format(
+        'path', 'mean ms', 'p50 ms', 'rows/s'
+    ))
+    for name, function in paths.items():
+        timings = measure(function, args.repeat)
+        print('{:<6} {:>10.3f} {:>10.3f} {:>10.0f}'.format(
+            name,
+            statistics.mean(timings) * 1000,
+            statistics.median(timings) * 1000,
+            args.page_size / statistics.mean(timings)
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+
+from benchmarks.endpoints import compare, percentile
+
+
+def results(throughput, p99_ms, queries):
+    return {'endpoints': {'me': {
+        'throughput': throughput, 'p99_ms': p99_ms, 'queries': queries
+    }}}
+
+
+class EndpointBenchmarkTests(SimpleTestCase):
+    """Test the endpoint benchmark result handling"""
+
+    def test_percentile(self):
+        """Test the nearest-rank percentiles"""
+
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+
+    def test_compare_within_threshold(self):
+        """Test that small changes are not reported"""
+
+        regressions = compare(results(95, 10.5, 1), results(100, 10, 1), 0.1)
+
+        self.assertEqual(regressions, [])
+
+    def test_compare_reports_regressions(self):
+        """Test that slower, lower throughput or extra queries are reported"""
+
+        regressions = compare(results(50, 20, 2), results(100, 10, 1), 0.1)
+
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(r.startswith('me: ') for r in regressions))
+
+    def test_compare_without_query_counts(self):
+        """Test that runs against a server skip the query comparison"""
+
+        regressions = compare(results(100, 10, None), results(100, 10, 1),
+                              0.1)
+
+        self.assertEqual(regressions, [])
@@ -1,5 +1,176 @@
-from django.contrib import admin
+from collections import Counter
 
-from core import models
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.authtoken.models import Token
 
-admin.site.register(models.User)
+from core import models, versions
+from user.authentication import invalidate_tokens
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the row count of unfiltered large tables
+
+    An exact COUNT(*) reads the whole table on PostgreSQL, the planner's
+    estimate is used instead when the list is not filtered and large
+    enough for the difference not to matter.
+    """
+
+    # Below this many rows the table is counted exactly
+    ESTIMATE_ABOVE = 100000
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if connection.vendor == 'postgresql' and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [self.object_list.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row is not None and row[0] > self.ESTIMATE_ABOVE:
+                return int(row[0])
+
+        return super().count
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables too large to count or scan"""
+
+    paginator = EstimatedCountPaginator
+    # No second COUNT(*) of the whole table next to the filtered one
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class VehicleInline(admin.TabularInline):
+    model = models.Vehicle
+    fields = ('car_id', 'plate', 'created_at')
+    readonly_fields = ('plate', 'created_at')
+    extra = 0
+
+
+@admin.register(models.User)
+class UserAdmin(ScalableAdmin):
+    """Admin of the users, searched through the unique indexes"""
+
+    list_display = ('car_id', 'email', 'phone_number', 'unread',
+                    'is_active', 'is_staff')
+    list_select_related = ('unread_counter',)
+    # The search box, get_search_results() turns a term into index lookups
+    search_fields = ('plate', 'email', 'phone_number')
+    ordering = ('-id',)
+    fields = ('car_id', 'plate', 'email', 'phone_number', 'is_active',
+              'is_staff', 'is_superuser', 'groups', 'user_permissions',
+              'last_login')
+    readonly_fields = ('plate', 'last_login')
+    autocomplete_fields = ('groups',)
+    raw_id_fields = ('user_permissions',)
+    inlines = (VehicleInline,)
+    actions = ('deactivate', 'activate')
+
+    def unread(self, user):
+        """The user's unread notifications"""
+
+        counter = getattr(user, 'unread_counter', None)
+        return counter.unread if counter is not None else 0
+
+    def get_search_results(self, request, queryset, search_term):
+        """Find users by an exact email or phone number or a plate prefix"""
+
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        manager = models.User.objects
+        query = Q(email=manager.normalize_email(term)) | Q(phone_number=term)
+        plate = manager.normalize_plate(term)
+        if plate:
+            # Any of the users' vehicles, over the unique plate index
+            query |= Q(pk__in=models.Vehicle.objects.filter(
+                plate__startswith=plate
+            ).values('user_id'))
+
+        return queryset.filter(query), False
+
+    def set_active(self, request, queryset, is_active):
+        """Update the users in a single UPDATE and drop their caches"""
+
+        with transaction.atomic():
+            user_ids = list(queryset.values_list('pk', flat=True))
+            updated = models.User.objects.filter(pk__in=user_ids) \
+                                         .update(is_active=is_active)
+
+            # The UPDATE skips the model signals, the cached token snapshots
+            # still hold the users as they were (see user.signals). They are
+            # dropped again once committed, a request in between may have
+            # cached the old rows.
+            keys = list(Token.objects.filter(user_id__in=user_ids)
+                                     .values_list('key', flat=True))
+            invalidate_tokens(*keys)
+            transaction.on_commit(lambda: invalidate_tokens(*keys))
+            versions.bump(*user_ids)
+
+        self.message_user(request, '{} {} users.'.format(
+            'Activated' if is_active else 'Deactivated', updated
+        ), messages.SUCCESS)
+
+    def deactivate(self, request, queryset):
+        self.set_active(request, queryset, False)
+    deactivate.short_description = 'Deactivate the selected users'
+    deactivate.allowed_permissions = ('change',)
+
+    def activate(self, request, queryset):
+        self.set_active(request, queryset, True)
+    activate.short_description = 'Activate the selected users'
+    activate.allowed_permissions = ('change',)
+
+
+@admin.register(models.Notification)
+class NotificationAdmin(ScalableAdmin):
+    """Read-only admin of the notifications"""
+
+    list_display = ('id', 'from_user', 'to_user', 'notification', 'count',
+                    'is_read', 'created_at')
+    list_select_related = ('from_user', 'to_user')
+    # The primary key index, newest first
+    ordering = ('-id',)
+    fields = ('from_user', 'to_user', 'notification', 'count', 'is_read',
+              'created_at', 'updated_at')
+    # Read state only changes along with the unread counters, the users
+    # are shown as text instead of select boxes of every user
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        # Notifications are sent through bulk_notify only
+        return False
+
+    def delete_model(self, request, obj):
+        """Delete a notification, keeping the counters in line"""
+
+        self.delete_queryset(
+            request, models.Notification.objects.filter(pk=obj.pk)
+        )
+
+    def delete_queryset(self, request, queryset):
+        """Delete notifications, keeping the counters in line"""
+
+        with transaction.atomic():
+            rows = list(queryset.select_for_update()
+                                .values_list('to_user_id', 'from_user_id',
+                                             'is_read'))
+            queryset.delete()
+            models.UnreadCounter.objects.add({
+                user_id: -count for user_id, count in Counter(
+                    to_user_id for to_user_id, from_user_id, is_read in rows
+                    if not is_read
+                ).items()
+            })
+            versions.bump(*{
+                user_id for row in rows for user_id in row[:2]
+            })
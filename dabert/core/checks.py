@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.core.checks import Error, Warning, register, Tags
+
+from core import versions
+
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+SHARED_CHANNEL_LAYER_BACKEND = 'channels_redis.core.RedisChannelLayer'
+CONSOLE_PROVIDER = 'notifications.providers.ConsoleProvider'
+
+
+@register(Tags.security)
+def check_debug_in_production(app_configs, **kwargs):
+    """Warn when the production profile runs with DEBUG on"""
+
+    if settings.SERVER_PROFILE == 'production' and settings.DEBUG:
+        return [Warning(
+            'DEBUG is on in the production server profile.',
+            hint='Set DEBUG=0, DEBUG leaks settings in error pages and '
+                 'keeps every SQL query in memory.',
+            id='core.W001',
+        )]
+
+    return []
+
+
+@register(Tags.caches)
+def check_local_cache_in_production(app_configs, **kwargs):
+    """Warn when the production profile keeps its cache per process"""
+
+    if settings.SERVER_PROFILE != 'production':
+        return []
+
+    return [
+        Warning(
+            "The '{}' cache is local to each server process.".format(alias),
+            hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared cache, '
+                 'the workers would otherwise keep apart token snapshots, '
+                 'user versions, throttle counters and idempotent responses.',
+            id='core.W002',
+        )
+        for alias, options in settings.CACHES.items()
+        if options['BACKEND'] == LOCAL_CACHE_BACKEND
+    ]
+
+
+@register(Tags.caches)
+def check_versions_cache_in_production(app_configs, **kwargs):
+    """Refuse per process user versions in the production profile"""
+
+    alias = versions.get_options()['CACHE_ALIAS']
+    if settings.SERVER_PROFILE == 'production' and \
+            settings.CACHES[alias]['BACKEND'] == LOCAL_CACHE_BACKEND:
+        return [Error(
+            "The user versions are kept in the per process '{}' "
+            "cache.".format(alias),
+            hint='A change bumps the version of one worker only, the others '
+                 'answer 304 Not Modified with stale data. Set '
+                 'CACHE_BACKEND to a shared cache.',
+            id='core.E001',
+        )]
+
+    return []
+
+
+@register()
+def check_channel_layer_in_production(app_configs, **kwargs):
+    """Refuse a per process channel layer in the production profile"""
+
+    layer = getattr(settings, 'CHANNEL_LAYERS', {}).get('default', {})
+    if settings.SERVER_PROFILE == 'production' and \
+            layer.get('BACKEND') != SHARED_CHANNEL_LAYER_BACKEND:
+        return [Error(
+            'The notifications are pushed through a per process channel '
+            'layer.',
+            hint='A notification created by one worker never reaches the '
+                 'websockets and long polls of the others. Set '
+                 'CHANNEL_LAYER_REDIS_URL to a shared Redis.',
+            id='core.E002',
+        )]
+
+    return []
+
+
+@register(Tags.security)
+def check_console_provider_in_production(app_configs, **kwargs):
+    """Refuse printing the notification messages in the production profile"""
+
+    if settings.SERVER_PROFILE != 'production':
+        return []
+
+    providers = getattr(settings, 'NOTIFICATION_DISPATCH', {}) \
+        .get('PROVIDERS', {})
+    return [
+        Error(
+            "The '{}' notifications are printed instead of sent.".format(
+                channel
+            ),
+            hint='The console provider marks the messages delivered and '
+                 'logs phone numbers, addresses and bodies. Set the '
+                 'channel to a real provider or leave it out.',
+            id='core.E003',
+        )
+        for channel, provider in sorted(providers.items())
+        if provider == CONSOLE_PROVIDER
+    ]
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Switch new SQLite connections to WAL mode"""
+
+    if connection.vendor != 'sqlite' or not settings.SQLITE_WAL:
+        return
+
+    # WAL lets readers run alongside the single writer, and with it a
+    # NORMAL synchronous level is still safe against corruption.
+    connection.connection.execute('PRAGMA journal_mode=WAL')
+    connection.connection.execute('PRAGMA synchronous=NORMAL')
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, **kwargs):
+    """Close the persistent connections that are no longer usable"""
+
+    if not settings.DB_HEALTH_CHECKS:
+        return
+
+    for connection in connections.all():
+        persistent = connection.settings_dict['CONN_MAX_AGE'] != 0
+        if persistent and connection.connection is not None \
+                and not connection.is_usable():
+            # The next query opens a new connection
+            connection.close()
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.crypto import salted_hmac
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+DEFAULTS = {
+    # Alias of the Django cache holding the responses, shared by every
+    # server process
+    'CACHE_ALIAS': 'default',
+    # Seconds a response is replayed to the retries of its key
+    'TIMEOUT': 86400,
+    # Seconds a retry waits for the in-flight request of its key
+    'WAIT': 10,
+    # Seconds between the checks of a waiting retry
+    'POLL_INTERVAL': 0.05,
+    # Seconds a request holds its key, longer than any request runs
+    'LOCK_TIMEOUT': 60,
+}
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+KEY_PREFIX = 'idempotency'
+MAX_KEY_LENGTH = 255
+
+
+def get_options():
+    """Return the idempotency settings merged with the defaults"""
+
+    return dict(DEFAULTS, **getattr(settings, 'IDEMPOTENCY', {}))
+
+
+def get_cache():
+    """Return the Django cache holding the responses"""
+
+    return caches[get_options()['CACHE_ALIAS']]
+
+
+def make_key(request, key):
+    """Return the cache key of an idempotency key sent to a request path"""
+
+    # Keys are the clients' own, the user and path keep them apart
+    user = request.user.pk if request.user.is_authenticated else None
+    digest = hashlib.md5('{} {} {} {}'.format(
+        user, request.method, request.path, key
+    ).encode('utf-8')).hexdigest()
+
+    return '{}:{}'.format(KEY_PREFIX, digest)
+
+
+def fingerprint(request):
+    """Return a keyed digest of the request data"""
+
+    # Keyed with SECRET_KEY, the data holds passwords and a plain hash of
+    # it kept in the cache could be brute forced
+    return salted_hmac(KEY_PREFIX, json.dumps(
+        request.data, sort_keys=True, cls=DjangoJSONEncoder
+    )).hexdigest()
+
+
+class IdempotentMixin:
+    """Replay the response of a write to the retries of its Idempotency-Key
+
+    The first request with a key runs and its response is kept in the cache,
+    a retry gets that response back without running the view again and one
+    sent while the first is still running waits for it. Views wrap their
+    write handlers with idempotent().
+    """
+
+    def idempotent(self, handler, request, *args, **kwargs):
+        """Return the stored response of the request's key, else the handler"""
+
+        key = request.META.get(HEADER)
+        if not key:
+            return handler(request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({'Idempotency-Key': [
+                'Ensure this header has no more than {} characters.'.format(
+                    MAX_KEY_LENGTH
+                )
+            ]})
+
+        options = get_options()
+        cache = get_cache()
+        cache_key = make_key(request, key)
+        lock_key = cache_key + ':lock'
+        digest = fingerprint(request)
+
+        deadline = time.monotonic() + options['WAIT']
+        while True:
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return self.replay(stored, digest)
+
+            if cache.add(lock_key, digest, options['LOCK_TIMEOUT']):
+                # The request holding the key may have stored its response
+                # and let go between the two calls
+                stored = cache.get(cache_key)
+                if stored is None:
+                    break
+                cache.delete(lock_key)
+                return self.replay(stored, digest)
+
+            if time.monotonic() >= deadline:
+                return Response(
+                    {'detail': 'A request with this Idempotency-Key is '
+                               'still in progress.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            time.sleep(options['POLL_INTERVAL'])
+
+        try:
+            response = handler(request, *args, **kwargs)
+            # A server error is not the answer to the request, the retry
+            # runs it again
+            if response.status_code < 500:
+                cache.set(cache_key, {
+                    'fingerprint': digest,
+                    'status': response.status_code,
+                    'data': response.data,
+                    'headers': {
+                        name: value for name, value in response.items()
+                        if name != 'Content-Type'
+                    },
+                }, options['TIMEOUT'])
+        finally:
+            cache.delete(lock_key)
+
+        return response
+
+    def replay(self, stored, digest):
+        """Return a stored response, or 422 for a key reused with other data"""
+
+        if stored['fingerprint'] != digest:
+            return Response(
+                {'detail': 'This Idempotency-Key was used with different '
+                           'request data.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+
+        response = Response(stored['data'], status=stored['status'],
+                            headers=stored['headers'])
+        response['Idempotent-Replayed'] = 'true'
+
+        return response
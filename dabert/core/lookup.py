@@ -0,0 +1,189 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+from core.metrics import registry
+
+
+DEFAULTS = {
+    # Entries kept in the per process LRU
+    'MAX_SIZE': 10000,
+    # Seconds a per process entry is trusted, other processes only see
+    # invalidations through the shared cache once it expires
+    'LOCAL_TIMEOUT': 5,
+    # Alias of the shared Django cache, None to disable it
+    'CACHE_ALIAS': 'default',
+    # Seconds an entry is kept in the shared cache
+    'TIMEOUT': 300,
+}
+
+
+class CarIdLookup:
+    """Resolves car ids to user contact fields through a two level cache
+
+    Entries are looked up in a per process LRU first, then in the shared
+    Django cache and only then in the database. A car id resolves to the
+    owner of the vehicle with its plate. The caches are invalidated by the
+    user and vehicle model signals (see core.signals).
+    """
+
+    FIELDS = ('id', 'car_id', 'email', 'phone_number')
+    KEY_PREFIX = 'car-id-lookup:plate'
+
+    def __init__(self):
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def options(self):
+        """Return the lookup settings merged with the defaults"""
+
+        return dict(DEFAULTS, **getattr(settings, 'CAR_ID_LOOKUP', {}))
+
+    @property
+    def shared_cache(self):
+        """Return the shared cache or None when it is disabled"""
+
+        alias = self.options['CACHE_ALIAS']
+        return caches[alias] if alias else None
+
+    def normalize(self, car_id):
+        """Return the plate a car id is cached under"""
+
+        return get_user_model().objects.normalize_plate(car_id)
+
+    def make_key(self, plate):
+        """Return the shared cache key of a plate"""
+
+        digest = hashlib.md5(plate.encode('utf-8')).hexdigest()
+        return '{}:{}'.format(self.KEY_PREFIX, digest)
+
+    def get(self, car_id):
+        """Return the user fields of a car id, or None when not found"""
+
+        return self.get_many([car_id]).get(car_id)
+
+    def get_many(self, car_ids):
+        """Return a dict mapping every found car id to its user fields"""
+
+        normalized = {car_id: self.normalize(car_id) for car_id in car_ids}
+        keys = set(normalized.values())
+        found = self._get_local(keys)
+        registry.record_cache('car_id_lookup.local', hits=len(found),
+                              misses=len(keys) - len(found))
+
+        missing = keys - set(found)
+        if missing and self.shared_cache is not None:
+            shared = self._get_shared(missing)
+            registry.record_cache('car_id_lookup.shared', hits=len(shared),
+                                  misses=len(missing) - len(shared))
+            found.update(shared)
+
+        missing = keys - set(found)
+        if missing:
+            found.update(self._get_database(missing))
+
+        return {
+            car_id: found[key]
+            for car_id, key in normalized.items() if key in found
+        }
+
+    def invalidate(self, *car_ids):
+        """Drop the cached entries of the given car ids"""
+
+        keys = {self.normalize(car_id) for car_id in car_ids if car_id}
+
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+        cache = self.shared_cache
+        if cache is not None and keys:
+            cache.delete_many([self.make_key(key) for key in keys])
+
+    def clear(self):
+        """Drop every entry of the per process LRU"""
+
+        with self._lock:
+            self._local.clear()
+
+    def _get_local(self, keys):
+        """Return the fresh entries of the per process LRU"""
+
+        now = time.monotonic()
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                item = self._local.get(key)
+                if item is None:
+                    continue
+
+                expires, entry = item
+                if expires < now:
+                    del self._local[key]
+                    continue
+
+                self._local.move_to_end(key)
+                found[key] = entry
+
+        return found
+
+    def _set_local(self, entries):
+        """Store entries in the per process LRU, evicting the oldest"""
+
+        options = self.options
+        expires = time.monotonic() + options['LOCAL_TIMEOUT']
+
+        with self._lock:
+            for key, entry in entries.items():
+                self._local[key] = (expires, entry)
+                self._local.move_to_end(key)
+
+            while len(self._local) > options['MAX_SIZE']:
+                self._local.popitem(last=False)
+
+    def _get_shared(self, keys):
+        """Return the entries found in the shared cache"""
+
+        cache = self.shared_cache
+        if cache is None:
+            return {}
+
+        cache_keys = {self.make_key(key): key for key in keys}
+        found = {
+            cache_keys[cache_key]: entry
+            for cache_key, entry in cache.get_many(cache_keys).items()
+        }
+        self._set_local(found)
+
+        return found
+
+    def _get_database(self, keys):
+        """Return the entries found in the database and cache them"""
+
+        # One join from the unique plate index of the vehicles to their
+        # owners
+        rows = apps.get_model('core', 'Vehicle').objects \
+            .filter(plate__in=keys) \
+            .values_list('plate', *('user__' + field for field in self.FIELDS))
+        found = {row[0]: dict(zip(self.FIELDS, row[1:])) for row in rows}
+
+        cache = self.shared_cache
+        if cache is not None and found:
+            cache.set_many(
+                {self.make_key(key): entry for key, entry in found.items()},
+                self.options['TIMEOUT']
+            )
+        self._set_local(found)
+
+        return found
+
+
+car_id_lookup = CarIdLookup()
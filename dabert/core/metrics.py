@@ -0,0 +1,163 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+
+def format_labels(labels):
+    """Return a Prometheus label set from (name, value) pairs"""
+
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+                         .replace('\n', '\\n')
+
+    return ','.join('{}="{}"'.format(name, escape(value))
+                    for name, value in labels)
+
+
+class Histogram:
+    """Cumulative latency histogram"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append('{}_bucket{{{}}} {}'.format(
+                name, format_labels(labels + (('le', bound),)), cumulative
+            ))
+        lines.append('{}_bucket{{{}}} {}'.format(
+            name, format_labels(labels + (('le', '+Inf'),)), self.count
+        ))
+        lines.append('{}_sum{{{}}} {}'.format(
+            name, format_labels(labels), self.sum
+        ))
+        lines.append('{}_count{{{}}} {}'.format(
+            name, format_labels(labels), self.count
+        ))
+        return lines
+
+
+class MetricsRegistry:
+    """Request, database and cache metrics of the current process
+
+    Every worker process keeps its own registry, so /metrics reports the
+    process that served the scrape.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = defaultdict(Histogram)
+            self.requests = defaultdict(int)
+            self.queries = defaultdict(int)
+            self.query_seconds = defaultdict(float)
+            self.cache = defaultdict(int)
+
+    def observe_request(self, view, method, status, seconds, queries,
+                        query_seconds):
+        """Record a served request"""
+
+        with self._lock:
+            self.latency[(view, method)].observe(seconds)
+            self.requests[(view, method, status)] += 1
+            self.queries[view] += queries
+            self.query_seconds[view] += query_seconds
+
+    def record_cache(self, cache, hits=0, misses=0):
+        """Record the hits and misses of a cache lookup"""
+
+        with self._lock:
+            self.cache[(cache, 'hit')] += hits
+            self.cache[(cache, 'miss')] += misses
+
+    def render(self):
+        """Return the metrics in the Prometheus text format"""
+
+        with self._lock:
+            lines = [
+                '# HELP dabert_request_duration_seconds Request latency.',
+                '# TYPE dabert_request_duration_seconds histogram',
+            ]
+            for (view, method), histogram in sorted(self.latency.items()):
+                lines.extend(histogram.render(
+                    'dabert_request_duration_seconds',
+                    (('view', view), ('method', method))
+                ))
+
+            lines.extend([
+                '# HELP dabert_requests_total Served requests.',
+                '# TYPE dabert_requests_total counter',
+            ])
+            for (view, method, status), count in sorted(
+                    self.requests.items()):
+                lines.append('dabert_requests_total{{{}}} {}'.format(
+                    format_labels((('view', view), ('method', method),
+                                   ('status', status))),
+                    count
+                ))
+
+            lines.extend([
+                '# HELP dabert_db_queries_total Database queries.',
+                '# TYPE dabert_db_queries_total counter',
+            ])
+            for view, count in sorted(self.queries.items()):
+                lines.append('dabert_db_queries_total{{{}}} {}'.format(
+                    format_labels((('view', view),)), count
+                ))
+
+            lines.extend([
+                '# HELP dabert_db_query_seconds_total Database query time.',
+                '# TYPE dabert_db_query_seconds_total counter',
+            ])
+            for view, seconds in sorted(self.query_seconds.items()):
+                lines.append('dabert_db_query_seconds_total{{{}}} {}'.format(
+                    format_labels((('view', view),)), seconds
+                ))
+
+            lines.extend([
+                '# HELP dabert_cache_requests_total Cache lookups.',
+                '# TYPE dabert_cache_requests_total counter',
+            ])
+            for (cache, result), count in sorted(self.cache.items()):
+                lines.append('dabert_cache_requests_total{{{}}} {}'.format(
+                    format_labels((('cache', cache), ('result', result))),
+                    count
+                ))
+
+            lines.extend([
+                '# HELP dabert_cache_hit_ratio Cache hits over lookups.',
+                '# TYPE dabert_cache_hit_ratio gauge',
+            ])
+            for cache in sorted({cache for cache, result in self.cache}):
+                hits = self.cache[(cache, 'hit')]
+                total = hits + self.cache[(cache, 'miss')]
+                lines.append('dabert_cache_hit_ratio{{{}}} {}'.format(
+                    format_labels((('cache', cache),)),
+                    hits / total if total else 0.0
+                ))
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
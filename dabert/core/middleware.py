@@ -0,0 +1,122 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import routers
+from core.metrics import registry
+
+
+logger = logging.getLogger('dabert.performance')
+
+
+class QueryRecorder:
+    """Database execute wrapper counting and timing the queries"""
+
+    # SQL statements kept for the slow request log
+    MAX_STATEMENTS = 50
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.statements) < self.MAX_STATEMENTS:
+                self.statements.append((elapsed, sql))
+
+
+class PerformanceMiddleware:
+    """Record the latency and database usage of every request
+
+    Feeds the /metrics endpoint, adds a Server-Timing header and logs the
+    requests slower than PERFORMANCE_SLOW_REQUEST seconds with their SQL.
+    Enabled by the PERFORMANCE_METRICS setting.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFORMANCE_METRICS', False):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        elapsed = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+
+        registry.observe_request(
+            view, request.method, response.status_code, elapsed,
+            recorder.count, recorder.seconds
+        )
+
+        response['Server-Timing'] = \
+            'app;dur={:.2f}, db;dur={:.2f};desc="{} queries"'.format(
+                elapsed * 1000, recorder.seconds * 1000, recorder.count
+            )
+
+        if elapsed >= settings.PERFORMANCE_SLOW_REQUEST:
+            logger.warning(
+                'Slow request %s %s (%s) took %.3fs with %d queries '
+                'in %.3fs:\n%s',
+                request.method, request.path, view, elapsed, recorder.count,
+                recorder.seconds,
+                '\n'.join('  {:.3f}s {}'.format(seconds, sql)
+                          for seconds, sql in recorder.statements)
+            )
+
+        return response
+
+
+class PrimaryPinningMiddleware:
+    """Keep the reads of a client on the primary after it wrote
+
+    The reads of a request go to the primary once it wrote, and for
+    DATABASE_REPLICATION_LAG seconds after that the requests of the same
+    session, which carry a cookie. API clients are pinned by the version of
+    their user's data instead (see core.routers). Does nothing without
+    DATABASE_REPLICAS.
+    """
+
+    COOKIE_NAME = 'dabert_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        routers.begin_request(
+            request, pinned=self.COOKIE_NAME in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.end_request()
+
+        if wrote:
+            response.set_cookie(
+                self.COOKIE_NAME, '1', httponly=True,
+                max_age=settings.DATABASE_REPLICATION_LAG
+            )
+
+        return response
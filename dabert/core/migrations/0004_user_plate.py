@@ -0,0 +1,51 @@
+# Generated by Django 2.1.15 on 2026-10-18 12:00
+
+import re
+
+from django.db import migrations, models
+
+
+def normalize_plate(car_id):
+    # Frozen copy of UserManager.normalize_plate
+    return re.sub(r'[^0-9A-Z]', '', (car_id or '').upper())
+
+
+def populate_plates(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    db_alias = schema_editor.connection.alias
+
+    owners = {}
+    for user in User.objects.using(db_alias).only('car_id').iterator():
+        plate = normalize_plate(user.car_id)
+        if plate in owners:
+            raise RuntimeError(
+                'Car ids {!r} and {!r} have the same plate {!r}, change one '
+                'of them before migrating'.format(
+                    owners[plate], user.car_id, plate
+                )
+            )
+        owners[plate] = user.car_id
+
+        User.objects.using(db_alias).filter(pk=user.pk) \
+                                    .update(plate=plate)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_notificationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='plate',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(populate_plates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='plate',
+            field=models.CharField(editable=False, max_length=255, unique=True),
+        ),
+    ]
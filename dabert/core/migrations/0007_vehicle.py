@@ -0,0 +1,44 @@
+# Generated by Django 2.1.15 on 2026-10-18 11:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_vehicles(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Vehicle = apps.get_model('core', 'Vehicle')
+    db_alias = schema_editor.connection.alias
+
+    # Every user gets the vehicle of the car id they log in with
+    users = User.objects.using(db_alias).values_list('id', 'car_id', 'plate')
+    Vehicle.objects.using(db_alias).bulk_create(
+        (Vehicle(user_id=user_id, car_id=car_id, plate=plate)
+         for user_id, car_id, plate in users.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_notification_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vehicle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('car_id', models.CharField(max_length=255)),
+                ('plate', models.CharField(editable=False, max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='vehicles', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['user', 'plate'], name='vehicle_user_plate_idx'),
+        ),
+        migrations.RunPython(create_vehicles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.1.15 on 2026-10-18 11:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_counters(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    UnreadCounter = apps.get_model('core', 'UnreadCounter')
+    db_alias = schema_editor.connection.alias
+
+    # The existing notifications are read, every counter starts at zero
+    user_ids = User.objects.using(db_alias).values_list('id', flat=True)
+    UnreadCounter.objects.using(db_alias).bulk_create(
+        (UnreadCounter(user_id=user_id) for user_id in user_ids.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_vehicle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        # The notifications sent before read state was tracked are read,
+        # instead of a badge with the whole inbox
+        migrations.AddField(
+            model_name='notification',
+            name='is_read',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='is_read',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.1.15 on 2026-10-18 11:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_notification_unread'),
+    ]
+
+    operations = [
+        # CarType was dropped from the models without a migration, its
+        # table was never read or written since
+        migrations.RemoveField(
+            model_name='cartype',
+            name='user',
+        ),
+        migrations.DeleteModel(
+            name='CarType',
+        ),
+    ]
@@ -1,12 +1,66 @@
-from django.db import models
+import re
+import string
+from collections import Counter, defaultdict
+
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                         PermissionsMixin
 from django.core.validators import validate_email
 from django.conf import settings
 
+from core import versions
+from core.lookup import car_id_lookup
+from core.signals import notifications_created
+
 
 class UserManager(BaseUserManager):
 
+    # Characters of a normalized plate, anything else is a separator
+    PLATE_ALPHABET = string.digits + string.ascii_uppercase
+    # Longest plate searched for single typos, the neighbours of a plate
+    # grow with its length and are all sent in one IN query
+    MAX_FUZZY_LENGTH = 12
+
+    @classmethod
+    def normalize_car_id(cls, car_id):
+        """Normalizes a car id by removing the surrounding whitespace"""
+
+        return (car_id or '').strip()
+
+    @classmethod
+    def normalize_plate(cls, car_id):
+        """Returns the canonical plate of a car id, its letters and digits"""
+
+        return re.sub(r'[^0-9A-Z]', '', (car_id or '').upper())
+
+    @classmethod
+    def plate_neighbours(cls, plate):
+        """Returns the plates a single typo away from a plate"""
+
+        splits = [(plate[:i], plate[i:]) for i in range(len(plate) + 1)]
+        neighbours = set()
+        for head, tail in splits:
+            if tail:
+                neighbours.add(head + tail[1:])
+            if len(tail) > 1:
+                neighbours.add(head + tail[1] + tail[0] + tail[2:])
+            for char in cls.PLATE_ALPHABET:
+                neighbours.add(head + char + tail)
+                if tail:
+                    neighbours.add(head + char + tail[1:])
+
+        neighbours.discard(plate)
+        neighbours.discard('')
+        return neighbours
+
+    def get_by_natural_key(self, car_id):
+        """Finds a user by the plate of a car id, whatever its formatting"""
+
+        return self.get(plate=self.normalize_plate(car_id))
+
     def create_user(self, car_id, email, phone_number,
                     password=None, **extra_fields):
         """Creates and saves a new user"""
@@ -24,6 +78,7 @@ class UserManager(BaseUserManager):
         email = self.normalize_email(email)
         validate_email(email)
         # phone_number = self.normalize_phone_number(phone_number)
+        car_id = self.normalize_car_id(car_id)
 
         user = self.model(car_id=car_id, email=email,
                           phone_number=phone_number, **extra_fields)
@@ -47,7 +102,10 @@ class UserManager(BaseUserManager):
 class User(AbstractBaseUser, PermissionsMixin):
     """Custom user model that supports using car_id instead of user_name"""
 
+    # The car id users log in with, one of their vehicles (see Vehicle)
     car_id = models.CharField(max_length=255, unique=True)
+    # Canonical form of car_id, "12-345-67" and "1234567" are the same car
+    plate = models.CharField(max_length=255, unique=True, editable=False)
     email = models.EmailField(max_length=255, unique=True)
     phone_number = models.CharField(max_length=10, unique=True)
     is_active = models.BooleanField(default=True)
@@ -58,22 +116,485 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'car_id'
     REQUIRED_FIELDS = ['email', 'phone_number']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored car id so caches keyed by it can be dropped"""
+
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_car_id = instance.__dict__.get('car_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Keep the plate and the vehicle of the car id in line with it"""
+
+        self.plate = UserManager.normalize_plate(self.car_id)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'car_id' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'plate'}
+
+        # The stored car id, the signals reset it once saved
+        loaded = getattr(self, '_loaded_car_id', None)
+        adding = self._state.adding
+        if not adding and (loaded == self.car_id or (
+                update_fields is not None and 'car_id' not in update_fields)):
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            Vehicle.objects.set_login_vehicle(
+                self, UserManager.normalize_plate(loaded), created=adding
+            )
+            if adding:
+                UnreadCounter.objects.create(user=self)
+            else:
+                # The lists of the users it exchanged notifications with
+                # show its car id
+                versions.bump(*self.correspondent_ids())
+
+    def correspondent_ids(self):
+        """Returns the ids of the users it sent to or received from"""
+
+        senders = Notification.objects.filter(to_user=self) \
+                                      .values_list('from_user_id', flat=True)
+        recipients = Notification.objects.filter(from_user=self) \
+                                         .values_list('to_user_id', flat=True)
+        return set(senders.distinct()) | set(recipients.distinct())
+
+
+class VehicleManager(models.Manager):
+
+    def search_plate(self, query, limit=20):
+        """Returns the vehicles of a plate, longer plates, then typos"""
+
+        plate = UserManager.normalize_plate(query)
+        if not plate:
+            return []
+
+        # The unique index on plate serves the exact and prefix matches
+        # (the LIKE pattern index Django adds on PostgreSQL), the typos are
+        # looked up as an IN list over the same index instead of a scan.
+        vehicles = list(self.filter(plate__startswith=plate)
+                            .order_by('plate')[:limit])
+        vehicles.sort(key=lambda vehicle: vehicle.plate != plate)
+
+        if len(vehicles) < limit and \
+                len(plate) <= UserManager.MAX_FUZZY_LENGTH:
+            found = {vehicle.pk for vehicle in vehicles}
+            vehicles.extend(
+                vehicle for vehicle in self.filter(
+                    plate__in=UserManager.plate_neighbours(plate)
+                ).order_by('plate')
+                if vehicle.pk not in found
+            )
+
+        return vehicles[:limit]
+
+    def set_login_vehicle(self, user, old_plate='', created=False):
+        """Makes the vehicle of a user's car id follow the car id"""
+
+        if not created:
+            vehicles = self.filter(user=user)
+            # Already one of the user's vehicles, the old one is kept
+            if vehicles.filter(plate=user.plate).update(car_id=user.car_id):
+                return
+            if old_plate and vehicles.filter(plate=old_plate).update(
+                    car_id=user.car_id, plate=user.plate):
+                return
+
+        self.create(user=user, car_id=user.car_id)
+
+    def create_for_users(self, users):
+        """Creates the vehicles of the car ids of users saved in bulk"""
+
+        ids = {user.plate: user.pk for user in users}
+        if users and users[0].pk is None:
+            # bulk_create only returns the ids on PostgreSQL, the unique
+            # plates find the others.
+            ids = dict(get_user_model().objects.filter(
+                plate__in=list(ids)
+            ).values_list('plate', 'id'))
+
+        return self.bulk_create(
+            self.model(user_id=ids[user.plate], car_id=user.car_id,
+                       plate=user.plate)
+            for user in users
+        )
+
+
+class Vehicle(models.Model):
+    """Vehicle whose notifications a user receives"""
+
+    # The (user, plate) index below serves the lookups by user
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='vehicles',
+        db_index=False
+    )
+    car_id = models.CharField(max_length=255)
+    # Unique across all the users, a plate has one owner
+    plate = models.CharField(max_length=255, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = VehicleManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'plate'],
+                         name='vehicle_user_plate_idx'),
+        ]
+
+    def __str__(self):
+        """A string representation for the vehicle model"""
+        return "{} {}".format(self.user_id, self.car_id)
+
+    def save(self, *args, **kwargs):
+        """Keep the plate in line with the car id"""
+
+        self.plate = UserManager.normalize_plate(self.car_id)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'car_id' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'plate'}
+
+        super().save(*args, **kwargs)
+
+
+class NotificationManager(models.Manager):
+
+    COALESCING_DEFAULTS = {
+        # Seconds repeated notifications are merged into one row, 0 disables
+        'WINDOW': 0,
+        # 'recipient' merges the same code sent to a user by anyone,
+        # 'sender' only the ones from the same sender
+        'SCOPE': 'recipient',
+    }
+
+    def coalescing_options(self):
+        """Returns the coalescing settings merged with the defaults"""
+
+        return dict(self.COALESCING_DEFAULTS,
+                    **getattr(settings, 'NOTIFICATION_COALESCING', {}))
+
+    def coalesce_key(self, notification):
+        """Returns the key notifications merged into the same row share"""
+
+        options = self.coalescing_options()
+        if not options['WINDOW']:
+            return None
+
+        window = int(timezone.now().timestamp() // options['WINDOW'])
+        parts = [notification.to_user_id, notification.notification, window]
+        if options['SCOPE'] == 'sender':
+            parts.insert(0, notification.from_user_id)
+
+        return ':'.join(str(part) for part in [options['SCOPE']] + parts)
+
+    def bulk_notify(self, from_user, car_ids, notification):
+        """Sends a notification to many car ids and reports each result"""
+
+        # Resolve every recipient through the lookup cache, the misses with
+        # a single indexed query.
+        recipients = car_id_lookup.get_many(car_ids)
+
+        report = []
+        to_create = []
+        # Index in the report of every notification to create
+        indexes = []
+        seen = set()
+        for car_id in car_ids:
+            # Differently formatted car ids of one plate, and the plates of
+            # one user's vehicles, are duplicates too
+            recipient = recipients.get(car_id)
+            key = recipient['id'] if recipient else \
+                car_id_lookup.normalize(car_id)
+            if key in seen:
+                result = self.model.DUPLICATE
+            elif recipient is None:
+                result = self.model.NOT_FOUND
+            elif recipient['id'] == from_user.pk:
+                result = self.model.SELF
+            else:
+                result = self.model.SENT
+                to_create.append(self.model(
+                    from_user=from_user,
+                    # The cached fields of the recipient spare the receivers
+                    # of notifications_created a query per row.
+                    to_user=get_user_model()(**recipient),
+                    notification=notification
+                ))
+                to_create[-1].coalesce_key = \
+                    self.coalesce_key(to_create[-1])
+                indexes.append(len(report))
+
+            seen.add(key)
+            report.append({'car_id': car_id, 'status': result})
+
+        with transaction.atomic(using=self.db):
+            try:
+                with transaction.atomic(using=self.db):
+                    created = self._create_coalesced(to_create)
+            except IntegrityError:
+                # A concurrent request inserted one of the keys first, it is
+                # merged into on the second try.
+                created = self._create_coalesced(to_create)
+
+            self._set_bulk_ids(from_user, created)
+            UnreadCounter.objects.add(
+                Counter(notification.to_user_id for notification in created)
+            )
+            notifications_created.send(sender=self.model,
+                                       notifications=created)
+
+        # Unsaved models are not hashable
+        created = {id(notification) for notification in created}
+        for index, notification in zip(indexes, to_create):
+            if id(notification) not in created:
+                report[index]['status'] = self.model.COALESCED
+
+        return report
+
+    def _create_coalesced(self, notifications):
+        """Merges repeats into their existing rows, inserts the others"""
+
+        keys = [n.coalesce_key for n in notifications if n.coalesce_key]
+        merged = {}
+        if keys:
+            # The unique key makes a concurrent insert of the same key fail
+            # instead of adding a second row. The lock keeps a concurrent
+            # mark_read from counting the rows read in between.
+            rows = self.select_for_update().filter(coalesce_key__in=keys) \
+                       .values_list('coalesce_key', 'to_user_id', 'is_read',
+                                    'from_user_id')
+            merged = {
+                key: (to_user_id, is_read, from_user_id)
+                for key, to_user_id, is_read, from_user_id in rows
+            }
+        if merged:
+            self.filter(coalesce_key__in=merged).update(
+                count=models.F('count') + 1, updated_at=timezone.now(),
+                is_read=False
+            )
+            # A repeat of a read notification is unread again
+            UnreadCounter.objects.add(Counter(
+                to_user_id for to_user_id, is_read, from_user_id
+                in merged.values() if is_read
+            ))
+            # The recipients' lists and the sent lists of the rows' senders
+            # show the new counts
+            versions.bump(*{
+                user_id for to_user_id, is_read, from_user_id
+                in merged.values() for user_id in (to_user_id, from_user_id)
+            })
+
+        created = [n for n in notifications if n.coalesce_key not in merged]
+        self.bulk_create(created)
+        return created
+
+    def mark_read(self, user, up_to_id):
+        """Marks the notifications of a user up to an id read
+
+        Returns the amount marked. A single UPDATE over the (to_user, id)
+        index, its row count keeps the user's unread counter in line.
+        """
+
+        with transaction.atomic(using=self.db):
+            unread = self.filter(
+                to_user=user, id__lte=up_to_id, is_read=False
+            )
+            # The senders' sent lists show the read state too
+            senders = set(unread.values_list('from_user_id', flat=True)
+                                .distinct())
+            marked = unread.update(is_read=True)
+            if marked:
+                UnreadCounter.objects.add({user.pk: -marked})
+                versions.bump(user.pk, *senders)
+
+        return marked
+
+    def _set_bulk_ids(self, from_user, notifications):
+        """Sets the ids of notifications the backend did not return"""
+
+        if not notifications or notifications[0].pk is not None:
+            return
+
+        # SQLite holds the write lock until the transaction ends, so the
+        # newest rows of the sender are the ones just inserted, in order.
+        ids = self.filter(from_user=from_user).order_by('-id') \
+                  .values_list('id', flat=True)[:len(notifications)]
+        for notification, pk in zip(notifications, reversed(list(ids))):
+            notification.pk = pk
+
 
 class Notification(models.Model):
     """Notification between users model"""
 
     from_user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        related_name='sent_notifications'
     )
 
     to_user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        related_name='received_notifications'
     )
 
     notification = models.IntegerField()
+    # Changes only along with the recipient's UnreadCounter
+    is_read = models.BooleanField(default=False)
+    # Times the notification was sent, repeats within the coalescing window
+    # are merged into one row (see NotificationManager.coalesce_key)
+    count = models.PositiveIntegerField(default=1)
+    coalesce_key = models.CharField(max_length=100, null=True, unique=True,
+                                    editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = NotificationManager()
+
+    # Per recipient results of a bulk notification
+    SENT = 'sent'
+    NOT_FOUND = 'not_found'
+    SELF = 'self'
+    DUPLICATE = 'duplicate'
+    COALESCED = 'coalesced'
+
+    class Meta:
+        # The inbox is paginated by a keyset over (user, id), so both
+        # directions need a composite index to seek straight to a page.
+        indexes = [
+            models.Index(fields=['to_user', '-id'],
+                         name='notification_to_user_id_idx'),
+            models.Index(fields=['from_user', '-id'],
+                         name='notification_from_user_id_idx'),
+            # Retention finds the expired rows by age (see
+            # notifications.retention)
+            models.Index(fields=['created_at'],
+                         name='notification_created_at_idx'),
+        ]
 
     def __str__(self):
         """A string representation fot the notification model"""
-        return "{} {} {}".format(str(from_user), str(to_user), notification)
+        return "{} {} {}".format(
+            self.from_user_id, self.to_user_id, self.notification
+        )
+
+
+class UnreadCounterManager(models.Manager):
+
+    def add(self, deltas):
+        """Adds to the unread counters of users, a dict of user id -> delta"""
+
+        users = defaultdict(list)
+        for user_id, delta in deltas.items():
+            if delta:
+                users[delta].append(user_id)
+
+        # One UPDATE per distinct delta, usually a single one. Counters do
+        # not go below zero for notifications created without bulk_notify.
+        for delta, user_ids in users.items():
+            unread = models.F('unread') + delta
+            if delta < 0:
+                unread = Greatest(unread, 0)
+            self.filter(user_id__in=user_ids).update(unread=unread)
+
+    def get_unread(self, user):
+        """Returns the amount of unread notifications of a user"""
+
+        return self.filter(user=user).values_list('unread', flat=True) \
+                   .first() or 0
+
+
+class UnreadCounter(models.Model):
+    """Amount of unread notifications of a user
+
+    Kept in its own narrow table, so the badge count is a primary key read
+    instead of a COUNT over the inbox, and the update of every received
+    notification does not rewrite the user row.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='unread_counter'
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    objects = UnreadCounterManager()
+
+    def __str__(self):
+        """A string representation for the unread counter model"""
+        return "{} {}".format(self.user_id, self.unread)
+
+
+class NotificationArchive(models.Model):
+    """Notification moved out of the notification table by retention"""
+
+    # The original id, and plain user ids so that deleting a user does not
+    # cascade into the archive
+    id = models.IntegerField(primary_key=True)
+    from_user_id = models.IntegerField()
+    to_user_id = models.IntegerField()
+    notification = models.IntegerField()
+    count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """A string representation for the archived notification model"""
+        return "{} {} {}".format(
+            self.from_user_id, self.to_user_id, self.notification
+        )
+
+
+class NotificationJob(models.Model):
+    """Queued delivery of a notification through an external channel"""
+
+    SMS = 'sms'
+    EMAIL = 'email'
+    CHANNEL_CHOICES = (
+        (SMS, 'SMS'),
+        (EMAIL, 'Email'),
+    )
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='jobs'
+    )
+    channel = models.CharField(max_length=16, choices=CHANNEL_CHOICES)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES,
+                              default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Workers claim the due jobs of a status in run_after order
+        indexes = [
+            models.Index(fields=['status', 'run_after'],
+                         name='notificationjob_due_idx'),
+        ]
+
+    def __str__(self):
+        """A string representation for the notification job model"""
+        return "{} {} {}".format(self.notification_id, self.channel,
+                                 self.status)
@@ -0,0 +1,32 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer encoding with orjson when it is installed
+
+    Falls back to the stdlib based JSONRenderer without orjson and for
+    indented output. Datetimes and the other types orjson does not handle
+    the same way go through the DRF encoder, so both produce the same
+    JSON.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or \
+                self.get_indent(accepted_media_type,
+                                renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+
+        # Escaped like JSONRenderer does, for JSON embedded in JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                  .replace(b'\xe2\x80\xa9', b'\\u2029')
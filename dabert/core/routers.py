@@ -0,0 +1,82 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import LazyObject
+
+from core import versions
+
+
+# Routing state of the request handled by the current thread
+_state = threading.local()
+
+
+def begin_request(request=None, pinned=False):
+    """Start routing a request, pinned reads only go to the primary"""
+
+    _state.request = request
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def end_request():
+    """Stop routing a request, return whether it wrote"""
+
+    wrote = getattr(_state, 'wrote', False)
+    begin_request()
+    return wrote
+
+
+def is_pinned():
+    """Return whether the reads of this thread have to see the primary"""
+
+    if getattr(_state, 'pinned', False) or getattr(_state, 'wrote', False):
+        return True
+
+    # A transaction reads its own writes
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return True
+
+    request = getattr(_state, 'request', None)
+    user = request.__dict__.get('user') if request is not None else None
+    # Evaluating the lazy session user would itself query
+    if user is None or isinstance(user, LazyObject) or \
+            not user.is_authenticated:
+        return False
+
+    # The user's data changed (see core.versions) more recently than the
+    # replicas are guaranteed to have caught up, checked once per request
+    tag, last_modified = versions.get_version(user.pk)
+    _state.request = None
+    _state.pinned = \
+        time.time() - last_modified < settings.DATABASE_REPLICATION_LAG
+
+    return _state.pinned
+
+
+class PrimaryReplicaRouter:
+    """Send the reads to the replicas and the writes to the primary
+
+    Reads go to a random alias of DATABASE_REPLICAS unless the thread is
+    pinned to the primary: once the request wrote, inside a transaction,
+    or for the replication lag after the request's user or session last
+    changed data (see PrimaryPinningMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned():
+            return DEFAULT_DB_ALIAS
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # The rest of the request reads its writes
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
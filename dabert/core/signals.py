@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from core import versions
+from core.lookup import car_id_lookup
+
+
+# Sent inside the creating transaction with the list of new notifications,
+# which may have been inserted in bulk without the model signals.
+notifications_created = Signal(providing_args=['notifications'])
+
+
+def invalidate_lookups(*car_ids):
+    """Drop the cached lookups right away and again once committed
+
+    A lookup in between reads the rows as they were before the
+    transaction and would cache them again.
+    """
+
+    car_id_lookup.invalidate(*car_ids)
+    transaction.on_commit(lambda: car_id_lookup.invalidate(*car_ids))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_car_id_lookup(sender, instance, **kwargs):
+    """Drop the cached lookups of the saved or deleted user car ids"""
+
+    plates = []
+    if not kwargs.get('created', True):
+        # The user's fields are cached under every plate of the user
+        plates = list(instance.vehicles.values_list('plate', flat=True))
+
+    invalidate_lookups(
+        instance.car_id, getattr(instance, '_loaded_car_id', None), *plates
+    )
+    instance._loaded_car_id = instance.car_id
+
+
+@receiver(post_save, sender='core.Vehicle')
+@receiver(post_delete, sender='core.Vehicle')
+def invalidate_vehicle(sender, instance, **kwargs):
+    """Drop the cached lookup of a vehicle, change its user's version"""
+
+    invalidate_lookups(instance.car_id)
+    versions.bump(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_user_version(sender, instance, created, **kwargs):
+    """Change the version behind the ETag of the saved user's responses"""
+
+    if not created:
+        versions.bump(instance.pk)
+
+
+@receiver(notifications_created)
+def bump_notification_versions(sender, notifications, **kwargs):
+    """Change the versions of the senders and recipients of notifications"""
+
+    versions.bump(*{
+        user_id
+        for notification in notifications
+        for user_id in (notification.from_user_id, notification.to_user_id)
+    })
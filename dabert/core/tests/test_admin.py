@@ -0,0 +1,139 @@
+from unittest import skipUnless
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Notification, UnreadCounter, Vehicle
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+@skipUnless(apps.is_installed('django.contrib.admin'),
+            'the API only profile has no admin')
+class AdminTests(TestCase):
+    """Test the admin of the users and notifications"""
+
+    def setUp(self):
+        cache.clear()
+
+        self.admin = get_user_model().objects.create_superuser(
+            car_id="000-000-000",
+            email="admin@email.com",
+            phone_number="0500000000",
+            password="password"
+        )
+        self.users = [
+            create_user(
+                car_id="123-456-78{}".format(i),
+                email="user{}@email.com".format(i),
+                phone_number="054444444{}".format(i),
+                password="password"
+            )
+            for i in range(3)
+        ]
+
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def search(self, term):
+        res = self.client.get(reverse('admin:core_user_changelist'),
+                              {'q': term})
+        return sorted(user.car_id for user in res.context['cl'].result_list)
+
+    def test_user_changelist_counts_once(self):
+        """Test that the changelist does not count the whole table twice"""
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse('admin:core_user_changelist'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        counts = [query['sql'] for query in queries
+                  if 'COUNT(' in query['sql']]
+        self.assertEqual(len(counts), 1)
+
+    def test_change_forms(self):
+        """Test that the user and notification pages render"""
+
+        Notification.objects.bulk_notify(self.users[0],
+                                         [self.users[1].car_id], 1)
+
+        res = self.client.get(reverse('admin:core_user_change',
+                                      args=[self.users[0].pk]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(reverse('admin:core_notification_change',
+                                      args=[Notification.objects.get().pk]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_user_search(self):
+        """Test finding users by email, phone number or plate prefix"""
+
+        Vehicle.objects.create(user=self.users[2], car_id="99-888-77")
+
+        self.assertEqual(self.search("user1@email.com"), ["123-456-781"])
+        self.assertEqual(self.search("0544444440"), ["123-456-780"])
+        self.assertEqual(self.search("123 456"),
+                         ["123-456-780", "123-456-781", "123-456-782"])
+        self.assertEqual(self.search("99888"), ["123-456-782"])
+
+    def test_deactivate_users(self):
+        """Test that users are deactivated at once, tokens included"""
+
+        user = self.users[0]
+        token = Token.objects.create(user=user)
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            token.key
+        ))
+        # Cache the token snapshot
+        api_client.get(reverse('user:me'))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('admin:core_user_changelist'), {
+                'action': 'deactivate',
+                '_selected_action': [u.pk for u in self.users[:2]],
+            })
+
+        updates = [query['sql'] for query in queries
+                   if query['sql'].startswith('UPDATE "core_user"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(get_user_model().objects.filter(is_active=False)
+                                         .order_by('pk')),
+            self.users[:2]
+        )
+        res = api_client.get(reverse('user:me'))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_delete_notifications(self):
+        """Test that deleted unread notifications leave the counters"""
+
+        sender, recipient = self.users[:2]
+        for notification in range(3):
+            Notification.objects.bulk_notify(sender, [recipient.car_id],
+                                             notification)
+        Notification.objects.mark_read(
+            recipient, Notification.objects.order_by('id')[0].pk
+        )
+
+        ids = Notification.objects.order_by('id') \
+                                  .values_list('pk', flat=True)
+        self.client.post(reverse('admin:core_notification_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': list(ids[:2]),
+            'post': 'yes',
+        })
+
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(UnreadCounter.objects.get_unread(recipient), 1)
@@ -0,0 +1,129 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_debug_in_production, \
+    check_local_cache_in_production, check_versions_cache_in_production, \
+    check_channel_layer_in_production, check_console_provider_in_production
+
+
+LOCMEM_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+MEMCACHED_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+    'LOCATION': '127.0.0.1:11211',
+}}
+
+IN_MEMORY_LAYERS = {'default': {
+    'BACKEND': 'channels.layers.InMemoryChannelLayer',
+}}
+REDIS_LAYERS = {'default': {
+    'BACKEND': 'channels_redis.core.RedisChannelLayer',
+    'CONFIG': {'hosts': ['redis://127.0.0.1:6379/0']},
+}}
+
+
+class SystemChecksTests(SimpleTestCase):
+    """Test the project system checks"""
+
+    @override_settings(SERVER_PROFILE='production', DEBUG=True)
+    def test_debug_in_production_warns(self):
+        """Test that DEBUG in the production profile is reported"""
+
+        messages = check_debug_in_production(None)
+
+        self.assertEqual([message.id for message in messages], ['core.W001'])
+
+    @override_settings(SERVER_PROFILE='production', DEBUG=False)
+    def test_production_without_debug(self):
+        """Test that a production profile without DEBUG passes"""
+
+        self.assertEqual(check_debug_in_production(None), [])
+
+    @override_settings(SERVER_PROFILE='development', DEBUG=True)
+    def test_debug_in_development(self):
+        """Test that DEBUG is fine in the development profile"""
+
+        self.assertEqual(check_debug_in_production(None), [])
+
+    @override_settings(SERVER_PROFILE='production', CACHES=LOCMEM_CACHES)
+    def test_local_cache_in_production_warns(self):
+        """Test that a per process cache in production is reported"""
+
+        messages = check_local_cache_in_production(None)
+
+        self.assertEqual([message.id for message in messages], ['core.W002'])
+
+    @override_settings(SERVER_PROFILE='production', CACHES=MEMCACHED_CACHES)
+    def test_shared_cache_in_production(self):
+        """Test that a shared cache in production passes"""
+
+        self.assertEqual(check_local_cache_in_production(None), [])
+
+    @override_settings(SERVER_PROFILE='development', CACHES=LOCMEM_CACHES)
+    def test_local_cache_in_development(self):
+        """Test that a per process cache is fine in development"""
+
+        self.assertEqual(check_local_cache_in_production(None), [])
+
+    @override_settings(SERVER_PROFILE='production', CACHES=LOCMEM_CACHES)
+    def test_local_versions_in_production_fail(self):
+        """Test that per process user versions in production are an error"""
+
+        messages = check_versions_cache_in_production(None)
+
+        self.assertEqual([message.id for message in messages], ['core.E001'])
+
+    @override_settings(SERVER_PROFILE='production', CACHES=MEMCACHED_CACHES)
+    def test_shared_versions_in_production(self):
+        """Test that shared user versions in production pass"""
+
+        self.assertEqual(check_versions_cache_in_production(None), [])
+
+    @override_settings(SERVER_PROFILE='production',
+                       CHANNEL_LAYERS=IN_MEMORY_LAYERS)
+    def test_in_memory_layer_in_production_fails(self):
+        """Test that a per process channel layer in production is an error"""
+
+        messages = check_channel_layer_in_production(None)
+
+        self.assertEqual([message.id for message in messages], ['core.E002'])
+
+    @override_settings(SERVER_PROFILE='production',
+                       CHANNEL_LAYERS=REDIS_LAYERS)
+    def test_redis_layer_in_production(self):
+        """Test that a Redis channel layer in production passes"""
+
+        self.assertEqual(check_channel_layer_in_production(None), [])
+
+    @override_settings(SERVER_PROFILE='development',
+                       CHANNEL_LAYERS=IN_MEMORY_LAYERS)
+    def test_in_memory_layer_in_development(self):
+        """Test that the in-memory layer is fine in development"""
+
+        self.assertEqual(check_channel_layer_in_production(None), [])
+
+    @override_settings(SERVER_PROFILE='production', NOTIFICATION_DISPATCH={
+        'PROVIDERS': {'sms': 'notifications.providers.ConsoleProvider'},
+    })
+    def test_console_provider_in_production_fails(self):
+        """Test that printing the messages in production is an error"""
+
+        messages = check_console_provider_in_production(None)
+
+        self.assertEqual([message.id for message in messages], ['core.E003'])
+
+    @override_settings(SERVER_PROFILE='production', NOTIFICATION_DISPATCH={
+        'PROVIDERS': {'email': 'notifications.providers.EmailProvider'},
+    })
+    def test_real_providers_in_production(self):
+        """Test that production without the console provider passes"""
+
+        self.assertEqual(check_console_provider_in_production(None), [])
+
+    @override_settings(SERVER_PROFILE='development', NOTIFICATION_DISPATCH={
+        'PROVIDERS': {'sms': 'notifications.providers.ConsoleProvider'},
+    })
+    def test_console_provider_in_development(self):
+        """Test that the console provider is fine in development"""
+
+        self.assertEqual(check_console_provider_in_production(None), [])
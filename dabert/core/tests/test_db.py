@@ -0,0 +1,89 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+from core.db import check_persistent_connections
+
+
+class SqliteConnectionTests(SimpleTestCase):
+    """Test the SQLite connection setup"""
+
+    def open_connection(self):
+        """Open a connection to a temporary SQLite database file"""
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        settings_dict = dict(
+            connection.settings_dict,
+            NAME=os.path.join(directory.name, 'test.db')
+        )
+        wrapper = DatabaseWrapper(settings_dict, alias='sqlite-file')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+
+        return wrapper
+
+    def journal_mode(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_WAL=True)
+    def test_wal_mode_enabled(self):
+        """Test that new connections are switched to WAL mode"""
+
+        self.assertEqual(self.journal_mode(self.open_connection()), 'wal')
+
+    @override_settings(SQLITE_WAL=False)
+    def test_wal_mode_disabled(self):
+        """Test that WAL mode can be turned off"""
+
+        self.assertEqual(self.journal_mode(self.open_connection()), 'delete')
+
+
+class ConnectionHealthCheckTests(SimpleTestCase):
+    """Test the health checks of persistent connections"""
+
+    def setUp(self):
+        patcher = mock.patch.dict(connection.settings_dict,
+                                  {'CONN_MAX_AGE': 60})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def check_connections(self, usable):
+        with mock.patch.object(connection, 'connection', mock.Mock()), \
+                mock.patch.object(connection, 'is_usable',
+                                  return_value=usable), \
+                mock.patch.object(connection, 'close') as close:
+            check_persistent_connections(sender=self.__class__)
+
+        return close
+
+    @override_settings(DB_HEALTH_CHECKS=True)
+    def test_unusable_connection_is_closed(self):
+        """Test that a broken persistent connection is closed"""
+
+        close = self.check_connections(usable=False)
+
+        close.assert_called_once_with()
+
+    @override_settings(DB_HEALTH_CHECKS=True)
+    def test_usable_connection_is_kept(self):
+        """Test that a healthy persistent connection is reused"""
+
+        close = self.check_connections(usable=True)
+
+        close.assert_not_called()
+
+    @override_settings(DB_HEALTH_CHECKS=False)
+    def test_health_checks_disabled(self):
+        """Test that the health checks can be turned off"""
+
+        close = self.check_connections(usable=False)
+
+        close.assert_not_called()
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+TOKEN_URL = reverse('user:token')
+
+PBKDF2_HASHERS = [
+    'core.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+@override_settings(PASSWORD_HASHERS=PBKDF2_HASHERS,
+                   PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHasherTests(TestCase):
+    """Test the settings driven password hashing"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {'car_id': "123-456-789", 'password': "password"}
+
+    def create_user(self):
+        return create_user(
+            email="test@email.com",
+            phone_number="0544444444",
+            **self.payload
+        )
+
+    def login(self):
+        res = self.client.post(TOKEN_URL, self.payload)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_iterations_read_from_settings(self):
+        """Test that new passwords are hashed with the configured cost"""
+
+        user = self.create_user()
+
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehash_on_login_when_cost_changes(self):
+        """Test that a login upgrades a hash with an outdated cost"""
+
+        user = self.create_user()
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.login()
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(user.check_password(self.payload['password']))
+
+    def test_rehash_on_login_when_hasher_changes(self):
+        """Test that a login upgrades a hash of a non preferred hasher"""
+
+        with self.settings(PASSWORD_HASHERS=PBKDF2_HASHERS[::-1]):
+            user = self.create_user()
+        self.assertTrue(user.password.startswith('md5$'))
+
+        self.login()
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_no_rehash_when_cost_is_current(self):
+        """Test that an up to date hash is not written again"""
+
+        user = self.create_user()
+        password = user.password
+
+        self.login()
+
+        user.refresh_from_db()
+        self.assertEqual(user.password, password)
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+
+from core import idempotency
+from core.models import Notification
+
+
+CREATE_USER_URL = reverse('user:create')
+BULK_NOTIFICATIONS_URL = reverse('notifications:notification-bulk')
+
+PAYLOAD = {
+    'car_id': "123-456-789",
+    'email': "test@email.com",
+    'phone_number': "0544444444",
+    'password': "password"
+}
+
+
+class IdempotencyTests(TestCase):
+    """Test replaying the responses of retried writes"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def signup(self, key, payload=PAYLOAD):
+        return self.client.post(CREATE_USER_URL, payload,
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def make_key(self, key):
+        request = APIRequestFactory().post(CREATE_USER_URL)
+        request.user = AnonymousUser()
+        return idempotency.make_key(request, key)
+
+    def test_retry_is_replayed(self):
+        """Test that a retry gets the first response without running again"""
+
+        first = self.signup('key-1')
+
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.signup('key-1')
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    def test_without_key(self):
+        """Test that requests without a key run every time"""
+
+        self.client.post(CREATE_USER_URL, PAYLOAD)
+        res = self.client.post(CREATE_USER_URL, PAYLOAD)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_key_reused_with_other_data(self):
+        """Test that a key sent again with other data is refused"""
+
+        self.signup('key-1')
+
+        res = self.signup('key-1', dict(PAYLOAD, email="other@email.com"))
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_key_too_long(self):
+        """Test that keys are limited in length"""
+
+        res = self.signup('k' * 256)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_retry_waits_for_first(self):
+        """Test that a retry sent during the first request waits for it"""
+
+        # The response the first request is about to store
+        self.signup('key-0')
+        stored = cache.get(self.make_key('key-0'))
+        cache.add(self.make_key('key-1') + ':lock', stored['fingerprint'])
+
+        timer = threading.Timer(0.2, cache.set,
+                                (self.make_key('key-1'), stored))
+        timer.start()
+        try:
+            res = self.signup('key-1')
+        finally:
+            timer.join()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res['Idempotent-Replayed'], 'true')
+
+    def test_response_stored_while_locking(self):
+        """Test that a response stored just before the lock is replayed"""
+
+        self.signup('key-0')
+        stored = cache.get(self.make_key('key-0'))
+        cache_key = self.make_key('key-1')
+        # The first request stores its response and lets go of the key
+        # between the retry's lookup and its lock
+        get = mock.Mock(side_effect=[None, stored])
+
+        with mock.patch.object(cache, 'get', get):
+            res = self.signup('key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res['Idempotent-Replayed'], 'true')
+        self.assertEqual(get_user_model().objects.count(), 1)
+        self.assertIsNone(cache.get(cache_key + ':lock'))
+
+    def test_fingerprint_is_keyed(self):
+        """Test that the stored digest is not a plain hash of the data"""
+
+        self.signup('key-1')
+        stored = cache.get(self.make_key('key-1'))
+
+        plain = hashlib.sha256(
+            json.dumps(PAYLOAD, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        self.assertNotEqual(stored['fingerprint'], plain)
+        with self.settings(SECRET_KEY='other'):
+            res = self.signup('key-1')
+        self.assertEqual(res.status_code,
+                         status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    @override_settings(IDEMPOTENCY={'WAIT': 0})
+    def test_retry_gives_up_waiting(self):
+        """Test that a retry stops waiting for a request still running"""
+
+        cache.add(self.make_key('key-1') + ':lock', 'running')
+
+        res = self.signup('key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_bulk_notification_retry(self):
+        """Test that a retried bulk notification is sent once"""
+
+        sender, recipient = [
+            get_user_model().objects.create_user(
+                car_id="000-000-00{}".format(i),
+                email="user{}@email.com".format(i),
+                phone_number="050000000{}".format(i),
+                password="password"
+            )
+            for i in range(2)
+        ]
+        self.client.force_authenticate(sender)
+        payload = {'car_ids': [recipient.car_id], 'notification': 1}
+
+        for _ in range(2):
+            res = self.client.post(BULK_NOTIFICATIONS_URL, payload,
+                                   format='json', HTTP_IDEMPOTENCY_KEY='key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['results'][0]['status'], Notification.SENT)
+        self.assertEqual(Notification.objects.get().count, 1)
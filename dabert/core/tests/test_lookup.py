@@ -0,0 +1,188 @@
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.lookup import car_id_lookup
+from core.models import Vehicle
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class CarIdLookupTests(TestCase):
+    """Test the cached car id to user resolution"""
+
+    def setUp(self):
+        car_id_lookup.clear()
+        cache.clear()
+
+        self.user = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+
+    def test_lookup_returns_contact_fields(self):
+        """Test that a car id resolves to the user contact fields"""
+
+        entry = car_id_lookup.get(self.user.car_id)
+
+        self.assertEqual(entry, {
+            'id': self.user.id,
+            'car_id': self.user.car_id,
+            'email': self.user.email,
+            'phone_number': self.user.phone_number
+        })
+
+    def test_lookup_normalizes_car_id(self):
+        """Test that surrounding whitespace does not change the lookup"""
+
+        entry = car_id_lookup.get("  {} ".format(self.user.car_id))
+
+        self.assertEqual(entry['id'], self.user.id)
+
+    def test_lookup_by_plate(self):
+        """Test that a differently formatted car id resolves the same user"""
+
+        entry = car_id_lookup.get("123 456 789")
+
+        self.assertEqual(entry['id'], self.user.id)
+
+    def test_lookup_by_vehicle(self):
+        """Test that the plate of any vehicle resolves its owner"""
+
+        vehicle = Vehicle.objects.create(user=self.user, car_id="11-222-33")
+
+        self.assertEqual(car_id_lookup.get("1122233")['id'], self.user.id)
+
+        vehicle.delete()
+
+        self.assertIsNone(car_id_lookup.get("1122233"))
+
+    def test_lookup_not_found(self):
+        """Test that an unknown car id resolves to None"""
+
+        self.assertIsNone(car_id_lookup.get("000"))
+
+    def test_lookup_is_cached(self):
+        """Test that a resolved car id is not queried again"""
+
+        car_id_lookup.get(self.user.car_id)
+
+        with self.assertNumQueries(0):
+            car_id_lookup.get(self.user.car_id)
+
+    def test_lookup_shared_cache(self):
+        """Test that the shared cache serves an empty process cache"""
+
+        car_id_lookup.get(self.user.car_id)
+        car_id_lookup.clear()
+
+        with self.assertNumQueries(0):
+            entry = car_id_lookup.get(self.user.car_id)
+
+        self.assertEqual(entry['id'], self.user.id)
+
+    def test_lookup_many_single_query(self):
+        """Test that the missing car ids are resolved in one query"""
+
+        other = create_user(
+            car_id="987-654-321",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+
+        with self.assertNumQueries(1):
+            found = car_id_lookup.get_many(
+                [self.user.car_id, other.car_id, "000"]
+            )
+
+        self.assertEqual(found[self.user.car_id]['id'], self.user.id)
+        self.assertEqual(found[other.car_id]['id'], other.id)
+        self.assertNotIn("000", found)
+
+    def test_lookup_invalidated_on_update(self):
+        """Test that changing a car id drops the old and new entries"""
+
+        old_car_id = self.user.car_id
+        car_id_lookup.get(old_car_id)
+
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.car_id = "111-111-111"
+        user.save()
+
+        self.assertIsNone(car_id_lookup.get(old_car_id))
+        self.assertEqual(car_id_lookup.get("111-111-111")['id'], user.id)
+
+    def test_lookup_invalidated_on_contact_change(self):
+        """Test that updating a contact field refreshes the entry"""
+
+        car_id_lookup.get(self.user.car_id)
+
+        self.user.email = "new@email.com"
+        self.user.save()
+
+        entry = car_id_lookup.get(self.user.car_id)
+        self.assertEqual(entry['email'], "new@email.com")
+
+    def test_lookup_invalidated_on_delete(self):
+        """Test that deleting a user drops its entry"""
+
+        car_id = self.user.car_id
+        car_id_lookup.get(car_id)
+
+        self.user.delete()
+
+        self.assertIsNone(car_id_lookup.get(car_id))
+
+    @override_settings(CAR_ID_LOOKUP={'MAX_SIZE': 1, 'CACHE_ALIAS': None})
+    def test_lookup_evicts_least_recently_used(self):
+        """Test that the process cache is bounded by its maximum size"""
+
+        other = create_user(
+            car_id="987-654-321",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+
+        car_id_lookup.get(self.user.car_id)
+        car_id_lookup.get(other.car_id)
+
+        with self.assertNumQueries(1):
+            car_id_lookup.get(self.user.car_id)
+
+
+class CarIdLookupCommitTests(TransactionTestCase):
+    """Test dropping the cached lookups once the change is committed"""
+
+    def setUp(self):
+        car_id_lookup.clear()
+        cache.clear()
+
+        self.user = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+
+    def test_lookup_cached_before_commit_is_dropped(self):
+        """Test that a lookup cached mid-transaction is not kept"""
+
+        plate = car_id_lookup.normalize(self.user.car_id)
+        stale = car_id_lookup.get(self.user.car_id)
+
+        with transaction.atomic():
+            self.user.email = "new@email.com"
+            self.user.save()
+            # Another process caches the row it still reads as it was
+            cache.set(car_id_lookup.make_key(plate), stale)
+
+        car_id_lookup.clear()
+        self.assertEqual(car_id_lookup.get(self.user.car_id)['email'],
+                         "new@email.com")
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.metrics import registry
+
+
+ME_URL = reverse('user:me')
+METRICS_URL = reverse('metrics')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+@override_settings(PERFORMANCE_METRICS=True,
+                   PERFORMANCE_METRICS_ALLOWED_IPS=['127.0.0.1'])
+class PerformanceMetricsTests(TestCase):
+    """Test the request performance instrumentation"""
+
+    def setUp(self):
+        registry.reset()
+
+        self.user = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        token = Token.objects.create(user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token {}'.format(token.key)
+        )
+
+    def test_server_timing_header(self):
+        """Test that responses carry the request and database timings"""
+
+        res = self.client.get(ME_URL)
+
+        self.assertRegex(
+            res['Server-Timing'],
+            r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$'
+        )
+
+    def test_metrics_endpoint(self):
+        """Test that the metrics of served requests are exposed"""
+
+        self.client.get(ME_URL)
+        self.client.get(ME_URL)
+
+        res = self.client.get(METRICS_URL)
+        body = res.content.decode()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            'dabert_request_duration_seconds_count'
+            '{view="user:me",method="GET"} 2', body
+        )
+        self.assertIn(
+            'dabert_requests_total'
+            '{view="user:me",method="GET",status="200"} 2', body
+        )
+        # The token lookup once, then the user on both requests
+        self.assertIn('dabert_db_queries_total{view="user:me"} 3', body)
+        self.assertIn(
+            'dabert_cache_requests_total{cache="auth_token",result="hit"} 1',
+            body
+        )
+        self.assertIn('dabert_cache_hit_ratio{cache="auth_token"} 0.5', body)
+
+    def test_metrics_restricted_to_allowed_ips(self):
+        """Test that the metrics are hidden from other addresses"""
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_metrics_hidden_behind_proxy(self):
+        """Test that a request proxied from another address is refused"""
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='127.0.0.1',
+                              HTTP_X_REAL_IP='203.0.113.7')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_real_ip_from_untrusted_address_ignored(self):
+        """Test that only a trusted proxy can name the client address"""
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='10.0.0.1',
+                              HTTP_X_REAL_IP='127.0.0.1')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST=0)
+    def test_slow_request_logged_with_sql(self):
+        """Test that a slow request is logged with its queries"""
+
+        with self.assertLogs('dabert.performance', 'WARNING') as logs:
+            self.client.get(ME_URL)
+
+        self.assertIn('user:me', logs.output[0])
+        self.assertIn('authtoken_token', logs.output[0])
+
+    @override_settings(PERFORMANCE_METRICS=False)
+    def test_metrics_disabled(self):
+        """Test that nothing is recorded when the metrics are disabled"""
+
+        res = self.client.get(ME_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
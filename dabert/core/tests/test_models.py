@@ -1,6 +1,9 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+
+from core.models import Vehicle
 
 
 class UserModelTests(TestCase):
@@ -53,3 +56,139 @@ class UserModelTests(TestCase):
                 phone_number="055555555",
                 password="testpass"
             )
+
+    def test_user_plate_is_normalized(self):
+        """Test that the plate of a user keeps only its letters and digits"""
+
+        user = get_user_model().objects.create_user(
+            car_id=" 12-ab 345 ",
+            email="test@gmail.com",
+            phone_number="0546811111",
+            password="password"
+        )
+
+        self.assertEqual(user.plate, "12AB345")
+
+        user.car_id = "99-999-99"
+        user.save(update_fields=['car_id'])
+        user.refresh_from_db()
+
+        self.assertEqual(user.plate, "9999999")
+
+    def test_get_user_by_any_plate_format(self):
+        """Test that a user is found by a differently formatted car id"""
+
+        user = get_user_model().objects.create_user(
+            car_id="123-456-789",
+            email="test@gmail.com",
+            phone_number="0546811111",
+            password="password"
+        )
+
+        found = get_user_model().objects.get_by_natural_key("123 456 789")
+
+        self.assertEqual(found, user)
+
+
+class VehicleModelTests(TestCase):
+    """Test the vehicles of the users"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            car_id="123-456-789",
+            email="test@gmail.com",
+            phone_number="0546811111",
+            password="password"
+        )
+
+    def test_user_has_car_id_vehicle(self):
+        """Test that a new user owns the vehicle of its car id"""
+
+        vehicle = self.user.vehicles.get()
+
+        self.assertEqual(vehicle.car_id, "123-456-789")
+        self.assertEqual(vehicle.plate, "123456789")
+
+    def test_vehicle_follows_car_id(self):
+        """Test that changing the car id changes its vehicle"""
+
+        Vehicle.objects.create(user=self.user, car_id="55-555-55")
+
+        self.user.car_id = "99-999-99"
+        self.user.save()
+
+        self.assertEqual(
+            sorted(self.user.vehicles.values_list('plate', flat=True)),
+            ["5555555", "9999999"]
+        )
+
+        # Logging in with another vehicle keeps the previous one
+        self.user.car_id = "55 555 55"
+        self.user.save()
+
+        self.assertEqual(
+            sorted(self.user.vehicles.values_list('car_id', flat=True)),
+            ["55 555 55", "99-999-99"]
+        )
+
+    def test_plate_has_one_owner(self):
+        """Test that a plate cannot belong to two users"""
+
+        other = get_user_model().objects.create_user(
+            car_id="000-000-000",
+            email="other@gmail.com",
+            phone_number="0546822222",
+            password="password"
+        )
+
+        with self.assertRaises(IntegrityError):
+            Vehicle.objects.create(user=other, car_id="123 456 789")
+
+
+class PlateSearchTests(TestCase):
+    """Test searching vehicles by full, partial or mistyped plates"""
+
+    def setUp(self):
+        self.users = {}
+        for i, car_id in enumerate(("123-456-78", "123-456-79",
+                                    "123-999-00", "555-555-55")):
+            self.users[car_id] = get_user_model().objects.create_user(
+                car_id=car_id,
+                email="test{}@gmail.com".format(i),
+                phone_number="054681111{}".format(i),
+                password="password"
+            )
+
+    def search(self, query, **kwargs):
+        return [vehicle.car_id for vehicle in
+                Vehicle.objects.search_plate(query, **kwargs)]
+
+    def test_search_exact_plate_first(self):
+        """Test that the exact plate comes before its typos"""
+
+        self.assertEqual(self.search("12345678"), ["123-456-78", "123-456-79"])
+
+    def test_search_prefix(self):
+        """Test that a partial plate finds the plates starting with it"""
+
+        self.assertEqual(self.search("123"),
+                         ["123-456-78", "123-456-79", "123-999-00"])
+
+    def test_search_typo(self):
+        """Test that a plate one character away is found"""
+
+        # Substitution, deletion and transposition
+        self.assertEqual(self.search("555-855-55"), ["555-555-55"])
+        self.assertEqual(self.search("55555-55"), ["555-555-55"])
+        self.assertEqual(self.search("123-990-90"), ["123-999-00"])
+
+    def test_search_limit(self):
+        """Test that the results are limited"""
+
+        self.assertEqual(len(self.search("1", limit=2)), 2)
+
+    def test_search_empty(self):
+        """Test that a query without letters or digits finds nothing"""
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search("--"), [])
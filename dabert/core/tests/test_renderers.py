@@ -0,0 +1,60 @@
+import datetime
+import decimal
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer
+
+
+DATA = {
+    'id': 1,
+    'created_at': datetime.datetime(2026, 1, 2, 3, 4, 5, 678901,
+                                    tzinfo=timezone.utc),
+    'amount': decimal.Decimal('1.50'),
+    'message': gettext_lazy('This field is required.'),
+    'errors': {0: ['invalid']},
+    'text': 'line\u2028separator \u05e9',
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the JSON renderer using orjson when installed"""
+
+    def test_render_same_as_json_renderer(self):
+        """Test that the output decodes to the same as JSONRenderer's"""
+
+        fast = FastJSONRenderer().render(DATA)
+        default = JSONRenderer().render(DATA)
+
+        self.assertEqual(json.loads(fast.decode()),
+                         json.loads(default.decode()))
+        self.assertIn(b'line\\u2028separator', fast)
+
+    def test_render_without_orjson(self):
+        """Test that the stdlib renderer is used without orjson"""
+
+        with mock.patch('core.renderers.orjson', None):
+            rendered = FastJSONRenderer().render(DATA)
+
+        self.assertEqual(rendered, JSONRenderer().render(DATA))
+
+    def test_render_indented(self):
+        """Test that indented output is left to the stdlib renderer"""
+
+        rendered = FastJSONRenderer().render(
+            DATA, 'application/json; indent=2'
+        )
+
+        self.assertEqual(
+            rendered, JSONRenderer().render(DATA, 'application/json; indent=2')
+        )
+
+    def test_render_none(self):
+        """Test that no data renders an empty body"""
+
+        self.assertEqual(FastJSONRenderer().render(None), b'')
@@ -0,0 +1,123 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import routers
+from core.middleware import PrimaryPinningMiddleware
+from core.models import Notification
+
+
+NOTIFICATIONS_URL = reverse('notifications:notification-list')
+CREATE_USER_URL = reverse('user:create')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """Test routing reads to the replica and writes to the primary
+
+    The replica is a separate, never replicated database, so a read served
+    by it does not see the rows written to the primary.
+    """
+
+    multi_db = True
+
+    def setUp(self):
+        cache.clear()
+        routers.begin_request()
+
+        self.user = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        self.other_user = create_user(
+            car_id="987-654-321",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+        routers.end_request()
+
+    def tearDown(self):
+        routers.end_request()
+
+    def exists(self):
+        return get_user_model().objects.filter(pk=self.user.pk).exists()
+
+    def test_reads_go_to_replica(self):
+        """Test that reads are served by the replica"""
+
+        self.assertEqual(get_user_model().objects.db, 'replica')
+        self.assertFalse(self.exists())
+
+    def test_writes_go_to_primary(self):
+        """Test that writes go to the primary and pin the request to it"""
+
+        self.user.save()
+
+        self.assertEqual(get_user_model().objects.db, 'default')
+        self.assertTrue(self.exists())
+
+        routers.end_request()
+        self.assertFalse(self.exists())
+
+    def test_transaction_reads_primary(self):
+        """Test that reads inside a transaction see its writes"""
+
+        with transaction.atomic():
+            self.assertTrue(self.exists())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        """Test that everything goes to the primary without replicas"""
+
+        self.assertTrue(self.exists())
+
+    def test_user_pinned_after_change(self):
+        """Test that a user whose data just changed reads the primary"""
+
+        # The recipient is only found on the primary
+        routers.begin_request(pinned=True)
+        Notification.objects.bulk_notify(
+            self.other_user, [self.user.car_id], 1
+        )
+        routers.end_request()
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.get(NOTIFICATIONS_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+        # Once the replicas caught up, the replica serves the list
+        with mock.patch('core.routers.time.time',
+                        return_value=time.time() + 60):
+            res = client.get(NOTIFICATIONS_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_session_pinned_after_write(self):
+        """Test that a request that wrote sets the primary cookie"""
+
+        res = APIClient().post(CREATE_USER_URL, {
+            'car_id': "111-111-111",
+            'email': "new@email.com",
+            'phone_number': "0511111111",
+            'password': "password"
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn(PrimaryPinningMiddleware.COOKIE_NAME, res.cookies)
@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.throttling import SlidingWindowCounter, parse_rate
+
+
+class SlidingWindowCounterTests(TestCase):
+    """Test the sliding window rate limit counters"""
+
+    def setUp(self):
+        cache.clear()
+        self.counter = SlidingWindowCounter(cache)
+
+    def test_parse_rate(self):
+        """Test that rates are parsed to requests per seconds"""
+
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('5/hour'), (5, 3600))
+
+    def test_hits_under_limit_allowed(self):
+        """Test that hits up to the limit are counted"""
+
+        for second in range(3):
+            self.assertIsNone(self.counter.hit(['a'], 3, 60, now=600 + second))
+
+        self.assertEqual(self.counter.hit(['a'], 3, 60, now=610), 50)
+
+    def test_keys_are_independent(self):
+        """Test that the hits of a key do not count against another"""
+
+        self.counter.hit(['a'], 1, 60, now=600)
+
+        self.assertIsNone(self.counter.hit(['b'], 1, 60, now=600))
+
+    def test_previous_window_slides_out(self):
+        """Test that the previous window counts by its remaining share"""
+
+        for _ in range(4):
+            self.counter.hit(['a'], 4, 60, now=630)
+
+        # 11/12 of the previous window is still inside the sliding window,
+        # a hit fits once that drops to 3/4
+        self.assertEqual(self.counter.hit(['a'], 4, 60, now=665), 10)
+        self.assertIsNone(self.counter.hit(['a'], 4, 60, now=675))
+
+    def test_refused_hit_counts_no_key(self):
+        """Test that a hit over the limit of one key counts on none"""
+
+        self.counter.hit(['a'], 1, 60, now=600)
+
+        self.assertIsNotNone(self.counter.hit(['a', 'b'], 1, 60, now=600))
+        self.assertIsNone(self.counter.hit(['b'], 1, 60, now=600))
+
+    def test_check_counts_no_hit(self):
+        """Test that checking a key leaves its count as it was"""
+
+        for _ in range(3):
+            self.assertIsNone(self.counter.check(['a'], 1, 60, now=600))
+
+        self.counter.add(['a'], 60, now=600)
+
+        self.assertEqual(self.counter.check(['a'], 1, 60, now=610), 50)
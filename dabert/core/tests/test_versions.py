@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core import versions
+
+
+class UserVersionTests(TestCase):
+    """Test the per user versions behind the conditional responses"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_is_stable(self):
+        """Test that a version does not change without a bump"""
+
+        self.assertEqual(versions.get_version(1), versions.get_version(1))
+
+    def test_bump_changes_version(self):
+        """Test that a bump changes the versions of the given users only"""
+
+        first, other = versions.get_version(1), versions.get_version(2)
+
+        versions.bump(1)
+
+        self.assertNotEqual(versions.get_version(1)[0], first[0])
+        self.assertEqual(versions.get_version(2), other)
+
+    @mock.patch('core.versions.time.time', return_value=1000.5)
+    def test_bump_moves_last_modified(self, time):
+        """Test that a bump within the same second moves Last-Modified"""
+
+        tag, last_modified = versions.get_version(1)
+        versions.bump(1)
+
+        self.assertEqual(last_modified, 1001)
+        self.assertEqual(versions.get_version(1)[1], 1002)
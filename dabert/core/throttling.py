@@ -0,0 +1,217 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+DEFAULTS = {
+    # Alias of the Django cache holding the counters, it has to be shared
+    # by every server process for the limits to hold across them
+    'CACHE_ALIAS': 'default',
+    # Requests allowed per scope as "<count>/<s|m|h|d>", a missing or empty
+    # rate disables the scope
+    'RATES': {},
+}
+
+KEY_PREFIX = 'throttle'
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_options():
+    """Return the throttling settings merged with the defaults"""
+
+    return dict(DEFAULTS, **getattr(settings, 'THROTTLING', {}))
+
+
+def parse_rate(rate):
+    """Return the (requests, seconds) of a "<count>/<period>" rate"""
+
+    count, period = rate.split('/')
+    return int(count), DURATIONS[period[0]]
+
+
+class SlidingWindowCounter:
+    """Approximate sliding window counters kept in a Django cache
+
+    Every key counts its hits in fixed windows, the estimate for the last
+    window length weights the previous window by the part of it still
+    inside the sliding window. Unlike a log of timestamps this is two
+    integers per key, updated with the atomic incr of the cache.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def make_key(self, key, window, index):
+        """Return the cache key of a key's counter in a window"""
+
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        return '{}:{}:{}:{}'.format(KEY_PREFIX, digest, window, index)
+
+    def hit(self, keys, limit, window, now=None):
+        """Count a hit on every key unless one of them is over the limit
+
+        Return None when the hit was counted, otherwise the seconds until
+        all the keys are under the limit again.
+        """
+
+        now = time.time() if now is None else now
+
+        wait = self.check(keys, limit, window, now)
+        if wait is None:
+            self.add(keys, window, now)
+
+        return wait
+
+    def check(self, keys, limit, window, now=None):
+        """Return the seconds until a hit on every key fits, None when it
+        fits already, without counting it"""
+
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, window)
+        index = int(index)
+
+        current = {key: self.make_key(key, window, index) for key in keys}
+        previous = {key: self.make_key(key, window, index - 1)
+                    for key in keys}
+        counts = self.cache.get_many(
+            list(current.values()) + list(previous.values())
+        )
+
+        wait = None
+        for key in keys:
+            before = counts.get(previous[key], 0)
+            count = counts.get(current[key], 0)
+            weight = 1 - elapsed / window
+
+            if before * weight + count + 1 <= limit:
+                continue
+
+            if count + 1 > limit or not before:
+                # Only the next window resets the count
+                seconds = window - elapsed
+            else:
+                # Until enough of the previous window slid out
+                seconds = window * (1 - (limit - count - 1) / before) - \
+                    elapsed
+            wait = max(wait or 0, seconds)
+
+        return wait
+
+    def add(self, keys, window, now=None):
+        """Count a hit on every key, whatever their limit"""
+
+        now = time.time() if now is None else now
+        index = int(now // window)
+
+        for key in keys:
+            self.incr(self.make_key(key, window, index), 2 * window)
+
+    def incr(self, key, timeout):
+        """Increment a counter, creating it when missing"""
+
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, timeout):
+                # Created by another process meanwhile
+                self.cache.incr(key)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle the requests of a scope with sliding window counters
+
+    Subclasses set the scope and return the identities a request counts
+    against from get_idents, the request is refused when any of them is
+    over the rate set for the scope in settings.THROTTLING.
+    """
+
+    scope = None
+
+    def get_idents(self, request, view):
+        """Return the identities the request counts against"""
+
+        raise NotImplementedError('.get_idents() must be overridden')
+
+    def get_keys(self, request, view):
+        """Return the counter keys of the request, prefixed by the scope"""
+
+        return [
+            '{}:{}'.format(self.scope, ident)
+            for ident in self.get_idents(request, view)
+        ]
+
+    def get_counter(self):
+        """Return the counter and (limit, window) of the scope, or None when
+        the scope is not limited"""
+
+        options = get_options()
+        rate = options['RATES'].get(self.scope)
+        if not rate:
+            return None, None
+
+        counter = SlidingWindowCounter(caches[options['CACHE_ALIAS']])
+        return counter, parse_rate(rate)
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+
+        counter, rate = self.get_counter()
+        keys = self.get_keys(request, view) if counter is not None else []
+        if not keys:
+            return True
+
+        self.wait_seconds = counter.hit(keys, *rate)
+
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class FailureThrottle(SlidingWindowThrottle):
+    """Throttle the requests of a scope once too many of them failed
+
+    Requests are refused while the failures are over the rate, the view
+    counts a failed request with record_failure().
+    """
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+
+        counter, rate = self.get_counter()
+        keys = self.get_keys(request, view) if counter is not None else []
+        if not keys:
+            return True
+
+        self.wait_seconds = counter.check(keys, *rate)
+
+        return self.wait_seconds is None
+
+    def record_failure(self, request, view):
+        """Count a failed request"""
+
+        counter, rate = self.get_counter()
+        keys = self.get_keys(request, view) if counter is not None else []
+        if keys:
+            counter.add(keys, rate[1])
+
+
+class AddressThrottle(SlidingWindowThrottle):
+    """Throttle the requests of a client address"""
+
+    def get_idents(self, request, view):
+        return [self.get_ident(request)]
+
+
+class UserThrottle(SlidingWindowThrottle):
+    """Throttle the requests of an authenticated user"""
+
+    def get_idents(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return []
+
+        return [request.user.pk]
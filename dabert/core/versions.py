@@ -0,0 +1,128 @@
+import hashlib
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+DEFAULTS = {
+    # Alias of the Django cache holding the user versions, shared by every
+    # server process (see core.checks)
+    'CACHE_ALIAS': 'default',
+    # Seconds a version is kept, an expired one only costs the clients a
+    # full response
+    'TIMEOUT': 86400,
+}
+
+KEY_PREFIX = 'user-version'
+
+
+def get_options():
+    """Return the user version settings merged with the defaults"""
+
+    return dict(DEFAULTS, **getattr(settings, 'USER_VERSIONS', {}))
+
+
+def get_cache():
+    """Return the Django cache holding the user versions"""
+
+    return caches[get_options()['CACHE_ALIAS']]
+
+
+def make_key(user_id):
+    """Return the cache key of a user's version"""
+
+    return '{}:{}'.format(KEY_PREFIX, user_id)
+
+
+def get_version(user_id):
+    """Return the (tag, last modified timestamp) of a user's data"""
+
+    cache = get_cache()
+    key = make_key(user_id)
+
+    version = cache.get(key)
+    if version is None:
+        # Unknown or expired, any version clients hold is stale
+        cache.add(key, (uuid.uuid4().hex, math.ceil(time.time())),
+                  get_options()['TIMEOUT'])
+        version = cache.get(key)
+
+    return version
+
+
+def _bump(user_ids):
+    cache = get_cache()
+    keys = {make_key(user_id) for user_id in user_ids}
+    current = cache.get_many(keys)
+    now = math.ceil(time.time())
+
+    # Last-Modified has a one second resolution, so a change always moves
+    # it past the one clients received before it
+    cache.set_many({
+        key: (uuid.uuid4().hex,
+              max(now, current[key][1] + 1) if key in current else now)
+        for key in keys
+    }, get_options()['TIMEOUT'])
+
+
+def bump(*user_ids):
+    """Change the version of users whose data changed
+
+    The version changes right away and again once the transaction is
+    committed, so that a response built in between from the old data does
+    not keep the new version.
+    """
+
+    if not user_ids:
+        return
+
+    _bump(user_ids)
+    transaction.on_commit(lambda: _bump(user_ids))
+
+
+class ConditionalGetMixin:
+    """Answer GET requests with 304 while the user's version is unchanged
+
+    The validators come from the cached version of the authenticated user,
+    so an unchanged resource is answered before any serialization or
+    query. Views wrap their GET handlers with conditional().
+    """
+
+    def get_validators(self, request):
+        """Return the ETag and Last-Modified of the request"""
+
+        tag, last_modified = get_version(request.user.pk)
+        digest = hashlib.md5('{} {} {}'.format(
+            tag, request.get_full_path(), request.accepted_media_type
+        ).encode('utf-8')).hexdigest()
+
+        return '"{}"'.format(digest), last_modified
+
+    def conditional(self, handler, request, *args, **kwargs):
+        """Return 304 when the client's copy is current, else the handler"""
+
+        if request.method not in ('GET', 'HEAD') or \
+                not request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Clients keep their copy but have to check it is current
+        patch_cache_control(response, private=True, no_cache=True)
+
+        return response
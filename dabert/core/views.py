@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.http import HttpResponse, Http404
+
+from core.metrics import registry
+
+
+def get_client_ip(request):
+    """Return the client address, as a trusted proxy reports it"""
+
+    address = request.META.get('REMOTE_ADDR')
+    if address in settings.PERFORMANCE_METRICS_TRUSTED_PROXIES:
+        # Requests proxied by nginx all come from the proxy, only a request
+        # sent to the server directly has no X-Real-IP
+        return request.META.get('HTTP_X_REAL_IP', address)
+
+    return address
+
+
+def metrics(request):
+    """Expose the metrics of this process to a Prometheus scraper"""
+
+    if not settings.PERFORMANCE_METRICS or get_client_ip(request) not in \
+            settings.PERFORMANCE_METRICS_ALLOWED_IPS:
+        raise Http404()
+
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4')
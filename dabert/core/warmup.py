@@ -0,0 +1,21 @@
+from django.urls import get_resolver
+from rest_framework.settings import api_settings
+
+
+def warm_up():
+    """Load what the first request would otherwise load
+
+    Imports the URLconf and every view, builds the URL reverse lookup and
+    imports the default DRF classes. Called when the WSGI and ASGI
+    applications are created, so with a preloading server this happens
+    once in the master and the workers share it.
+    """
+
+    resolver = get_resolver()
+    resolver.reverse_dict
+
+    for name in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES',
+                 'DEFAULT_AUTHENTICATION_CLASSES',
+                 'DEFAULT_PERMISSION_CLASSES',
+                 'DEFAULT_CONTENT_NEGOTIATION_CLASS'):
+        getattr(api_settings, name)
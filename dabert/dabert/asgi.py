@@ -0,0 +1,24 @@
+"""
+ASGI config for dabert project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Besides the regular Django views it serves the
+notification websockets and the long-poll endpoint (see dabert.routing).
+
+For more information on this file, see
+https://channels.readthedocs.io/en/2.x/deploying.html
+"""
+
+import os
+
+import django
+from channels.routing import get_default_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dabert.settings')
+django.setup()
+
+application = get_default_application()
+
+from core.warmup import warm_up  # noqa: E402
+
+warm_up()
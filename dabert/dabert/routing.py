@@ -0,0 +1,14 @@
+from channels.http import AsgiHandler
+from channels.routing import ProtocolTypeRouter, URLRouter
+from django.urls import re_path
+
+from notifications import routing as notifications_routing
+
+
+application = ProtocolTypeRouter({
+    'websocket': URLRouter(notifications_routing.websocket_urlpatterns),
+    'http': URLRouter(notifications_routing.http_urlpatterns + [
+        # Everything else is served by the regular Django views
+        re_path(r'', AsgiHandler),
+    ]),
+})
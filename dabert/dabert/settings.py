@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -22,6 +24,12 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = ')2q-x5#kws(o$!y!soq+66ju)g(cb#15%u2ay-6$^!*5w3(c1f'
 
+# Whether the process is running the test suite
+TESTING = sys.argv[1:2] == ['test']
+
+# Server profile, 'production' or 'development' (see gunicorn.conf.py)
+SERVER_PROFILE = os.environ.get('SERVER_PROFILE', 'development')
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = bool(int(os.environ.get('DEBUG', 1)))
 
@@ -39,13 +47,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'channels',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
     'user',
+    'notifications',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,17 +87,346 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'dabert.wsgi.application'
 
+ASGI_APPLICATION = 'dabert.routing.application'
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    # Encodes with orjson when it is installed (see core.renderers)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+
+# API-only profile
+# Every client talks token authenticated JSON to /api/, so API_ONLY drops
+# the admin, sessions, messages, static files, their middleware and the
+# browsable API from startup and from the path of every request. The
+# channels app only adds the ASGI runserver, whose import of daphne and
+# twisted is most of the startup time, the ASGI application is served by
+# daphne without it.
+API_ONLY = bool(int(os.environ.get('API_ONLY', 0)))
+
+if API_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if app not in (
+            'django.contrib.admin',
+            'django.contrib.sessions',
+            'django.contrib.messages',
+            'django.contrib.staticfiles',
+            'channels',
+        )
+    ]
+
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE if middleware not in (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.middleware.csrf.CsrfViewMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+            'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        )
+    ]
+
+    # Only the error pages are left, compiled once per process
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS'] = {
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            ['django.template.loaders.app_directories.Loader'],
+        )],
+    }
+
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = (
+        'core.renderers.FastJSONRenderer',
+    )
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = (
+        'user.authentication.CachedTokenAuthentication',
+    )
+
+
+# Channel layers
+# https://channels.readthedocs.io/en/2.x/topics/channel_layers.html
+
+# The in-memory layer only reaches connections of the same process, set
+# CHANNEL_LAYER_REDIS_URL (requires channels_redis) to push across workers.
+if os.environ.get('CHANNEL_LAYER_REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.environ['CHANNEL_LAYER_REDIS_URL']],
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
 
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# DATABASE_ENGINE selects PostgreSQL for production or SQLite for a single
+# node. PostgreSQL requires the psycopg2 package.
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'dabert'),
+            'USER': os.environ.get('DB_USER', 'dabert'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Keep connections open across requests instead of opening one
+            # per request, each worker holds at most one per thread.
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'OPTIONS': {
+                'connect_timeout': int(
+                    os.environ.get('DB_CONNECT_TIMEOUT', 5)
+                ),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get(
+                'DB_NAME', os.path.join(BASE_DIR, 'dabert.db')
+            ),
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before failing
+                'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20)),
+            },
+        }
+    }
+
+# Read replicas, given as DATABASE_REPLICAS hosts (file names on SQLite)
+# separated by commas. Reads are spread over them and writes go to the
+# default database (see core.routers).
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+
+for number, location in enumerate(
+        filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')),
+        start=1):
+    alias = 'replica{}'.format(number)
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        **{'HOST' if DATABASE_ENGINE == 'postgresql' else 'NAME': location},
+        TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(alias)
+
+# Seconds a client keeps reading from the primary after it changed data,
+# at least the replication lag of the replicas
+DATABASE_REPLICATION_LAG = int(os.environ.get('DATABASE_REPLICATION_LAG', 5))
+
+if TESTING:
+    if DATABASE_ENGINE != 'postgresql':
+        # In a file, unlike in the shared cache memory database, readers
+        # are not refused while a concurrent test transaction writes
+        DATABASES['default']['TEST'] = {
+            'NAME': os.path.join(tempfile.gettempdir(), 'test_dabert.db'),
+        }
+
+    # A separate database the router tests use as a replica, the other
+    # tests run without replicas
+    DATABASES['replica'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'dabert.db'),
+        'NAME': os.path.join(tempfile.gettempdir(), 'replica.db'),
+    }
+
+# Check persistent connections are still usable at the start of every
+# request, dropping the ones the server or a proxy closed (see core.db).
+DB_HEALTH_CHECKS = bool(int(os.environ.get('DB_HEALTH_CHECKS', 1)))
+
+# Put SQLite databases in WAL mode so readers do not block the writer. Off
+# by default in development, switching rewrites the header of the
+# dabert.db checked into the repository.
+SQLITE_WAL = bool(int(os.environ.get(
+    'SQLITE_WAL', int(SERVER_PROFILE == 'production' or TESTING)
+)))
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+# Production shares memcached between the workers (see core.checks)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'dabert'),
     }
 }
 
+# car_id -> user resolution cache (see core.lookup)
+CAR_ID_LOOKUP = {
+    'MAX_SIZE': int(os.environ.get('CAR_ID_LOOKUP_MAX_SIZE', 10000)),
+    'LOCAL_TIMEOUT': int(os.environ.get('CAR_ID_LOOKUP_LOCAL_TIMEOUT', 5)),
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('CAR_ID_LOOKUP_TIMEOUT', 300)),
+}
+
+# Token -> user snapshot cache (see user.authentication)
+AUTH_TOKEN_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 300)),
+}
+
+# User -> version cache behind the ETag and Last-Modified of the user and
+# notification list responses (see core.versions)
+USER_VERSIONS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('USER_VERSIONS_TIMEOUT', 86400)),
+}
+
+
+# Responses replayed to the retries of writes sent with an Idempotency-Key
+# header (see core.idempotency), the cache has to be shared by every server
+# process for the retries landing on another one
+IDEMPOTENCY = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('IDEMPOTENCY_TIMEOUT', 86400)),
+    'WAIT': int(os.environ.get('IDEMPOTENCY_WAIT', 10)),
+}
+
+# Sliding window rate limits of the abusable endpoints (see core.throttling),
+# counted in a cache shared by every server process
+THROTTLING = {
+    'CACHE_ALIAS': 'default',
+    'RATES': {
+        # Signups per client address
+        'signup': os.environ.get('THROTTLE_SIGNUP', '20/h'),
+        # Login attempts per client address and per car id
+        'login': os.environ.get('THROTTLE_LOGIN', '30/m'),
+        'login_car_id': os.environ.get('THROTTLE_LOGIN_CAR_ID', '10/m'),
+        # Notification requests per user and notifications per user and car
+        'notify': os.environ.get('THROTTLE_NOTIFY', '60/m'),
+        'notify_car_id': os.environ.get('THROTTLE_NOTIFY_CAR_ID', '10/h'),
+    },
+}
+
+
+# Repeats of a notification code to the same recipient within WINDOW seconds
+# only count on the first row instead of being inserted and delivered again
+# (see core.models.NotificationManager)
+NOTIFICATION_COALESCING = {
+    'WINDOW': int(os.environ.get('NOTIFICATION_COALESCING_WINDOW', 60)),
+    'SCOPE': os.environ.get('NOTIFICATION_COALESCING_SCOPE', 'recipient'),
+}
+
+
+# Days notifications stay in the notification table before the
+# archive_notifications command moves them out
+NOTIFICATION_RETENTION_DAYS = int(
+    os.environ.get('NOTIFICATION_RETENTION_DAYS', 90)
+)
+
+
+# Outbound notification delivery (see notifications.dispatch)
+NOTIFICATION_DISPATCH = {
+    'PROVIDERS': {
+        'email': os.environ.get(
+            'NOTIFICATION_EMAIL_PROVIDER',
+            'notifications.providers.EmailProvider'
+        ),
+    },
+    'MAX_ATTEMPTS': int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', 5)),
+    'RETRY_DELAY': int(os.environ.get('NOTIFICATION_RETRY_DELAY', 30)),
+}
+
+# There is no SMS service by default, production sends no SMS until one is
+# configured and development prints them
+if os.environ.get('NOTIFICATION_SMS_PROVIDER'):
+    NOTIFICATION_DISPATCH['PROVIDERS']['sms'] = \
+        os.environ['NOTIFICATION_SMS_PROVIDER']
+elif SERVER_PROFILE != 'production':
+    NOTIFICATION_DISPATCH['PROVIDERS']['sms'] = \
+        'notifications.providers.ConsoleProvider'
+
+
+# Request metrics (see core.middleware), exposed on /metrics to the
+# allowed addresses and in the Server-Timing response header
+PERFORMANCE_METRICS = bool(int(os.environ.get('PERFORMANCE_METRICS', 0)))
+PERFORMANCE_METRICS_ALLOWED_IPS = os.environ.get(
+    'PERFORMANCE_METRICS_ALLOWED_IPS', '127.0.0.1'
+).split(',')
+# Proxies whose X-Real-IP header gives the address checked instead
+PERFORMANCE_METRICS_TRUSTED_PROXIES = os.environ.get(
+    'PERFORMANCE_METRICS_TRUSTED_PROXIES', '127.0.0.1'
+).split(',')
+
+# Requests slower than this many seconds are logged with their SQL
+PERFORMANCE_SLOW_REQUEST = float(
+    os.environ.get('PERFORMANCE_SLOW_REQUEST', 1.0)
+)
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/2.1/topics/auth/passwords/
+
+# The preferred hasher encodes new passwords, the others only verify the
+# existing ones, which are re-hashed on the next successful login. The same
+# happens when the cost parameters of the preferred hasher change.
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    # Requires the argon2-cffi package
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    # Requires the bcrypt package
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+}
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER
+]
+
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 120000)
+)
+PASSWORD_HASH_ARGON2_TIME_COST = int(
+    os.environ.get('PASSWORD_HASH_ARGON2_TIME_COST', 2)
+)
+PASSWORD_HASH_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_HASH_ARGON2_MEMORY_COST', 512)
+)
+PASSWORD_HASH_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_HASH_ARGON2_PARALLELISM', 2)
+)
+PASSWORD_HASH_BCRYPT_ROUNDS = int(
+    os.environ.get('PASSWORD_HASH_BCRYPT_ROUNDS', 12)
+)
+
+if TESTING:
+    # The hashing strength is irrelevant to the tests and would dominate
+    # their runtime.
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+    NOTIFICATION_DISPATCH['PROVIDERS'] = {
+        'sms': 'notifications.providers.LocMemProvider',
+        'email': 'notifications.providers.LocMemProvider',
+    }
+
+    # The tests share a client address and a cache, the throttling tests
+    # set their own rates
+    THROTTLING['RATES'] = {}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
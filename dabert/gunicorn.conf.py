@@ -0,0 +1,89 @@
+"""
+Gunicorn config for dabert project.
+
+SERVER_PROFILE selects the defaults below, every value can be overridden
+through its GUNICORN_* environment variable. Run it from this directory:
+
+    gunicorn --config gunicorn.conf.py dabert.wsgi:application
+
+The websockets and the long-poll endpoint are not WSGI, daphne serves
+them from dabert.asgi (see deploy/supervisor_dabert_api.conf).
+
+For more information on this file, see
+https://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import multiprocessing
+import os
+
+
+def env(name, default):
+    """Return the GUNICORN_<name> environment variable or the default"""
+
+    return os.environ.get('GUNICORN_' + name, default)
+
+
+profile = os.environ.get('SERVER_PROFILE', 'development')
+
+if profile == 'production':
+    defaults = {
+        'BIND': '127.0.0.1:9000',
+        'WORKERS': multiprocessing.cpu_count() * 2 + 1,
+        'THREADS': 4,
+        'MAX_REQUESTS': 2000,
+        'BACKLOG': 2048,
+        'RELOAD': 0,
+    }
+else:
+    defaults = {
+        'BIND': '0.0.0.0:8001',
+        'WORKERS': 1,
+        'THREADS': 1,
+        'MAX_REQUESTS': 0,
+        'BACKLOG': 64,
+        'RELOAD': 1,
+    }
+
+bind = env('BIND', defaults['BIND'])
+
+# Worker processes, each serving THREADS requests at once
+workers = int(env('WORKERS', defaults['WORKERS']))
+threads = int(env('THREADS', defaults['THREADS']))
+worker_class = 'gthread'
+
+# Load Django in the master before forking, so the workers share the
+# imported code copy-on-write and boot instantly.
+preload_app = not int(env('RELOAD', defaults['RELOAD']))
+reload = not preload_app
+
+# Recycle workers after a number of requests, with jitter so they do not
+# all restart at once, to bound memory growth.
+max_requests = int(env('MAX_REQUESTS', defaults['MAX_REQUESTS']))
+max_requests_jitter = max_requests // 10
+
+# Pending connections queued by the kernel while all workers are busy
+backlog = int(env('BACKLOG', defaults['BACKLOG']))
+
+timeout = int(env('TIMEOUT', 30))
+graceful_timeout = int(env('GRACEFUL_TIMEOUT', 30))
+# Connections are kept alive by nginx in front
+keepalive = int(env('KEEPALIVE', 5))
+
+accesslog = env('ACCESSLOG', '-')
+errorlog = env('ERRORLOG', '-')
+
+
+def when_ready(server):
+    """Report the Django security check warnings once the server is up"""
+
+    import django
+    from django.core import checks
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dabert.settings')
+    django.setup()
+
+    for message in checks.run_checks(tags=[checks.Tags.security]):
+        server.log.warning(str(message))
+
+    server.log.info('Serving the %s profile with %d workers of %d threads',
+                    profile, workers, threads)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class NotificationsConfig(AppConfig):
     name = 'notifications'
+
+    def ready(self):
+        # Connect the signal receivers
+        from notifications import delivery, dispatch  # noqa: F401
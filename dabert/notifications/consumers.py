@@ -0,0 +1,125 @@
+import asyncio
+from urllib.parse import parse_qs
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.generic.http import AsyncHttpConsumer
+from channels.generic.websocket import JsonWebsocketConsumer
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Notification
+from notifications.delivery import group_name
+from notifications.serializers import NotificationSerializer
+from user.authentication import authenticate_token
+
+
+def get_token(scope):
+    """Return the token of an 'Authorization: Token' header or a 'token'
+    query string parameter"""
+
+    headers = dict(scope.get('headers', []))
+    keyword, _, key = headers.get(b'authorization', b'').partition(b' ')
+    if keyword.lower() == b'token' and key:
+        return key.decode('latin1')
+
+    query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+    return query.get('token', [None])[0]
+
+
+def authenticate_scope(scope):
+    """Return the authenticated user of a connection scope, or None"""
+
+    key = get_token(scope)
+    return authenticate_token(key) if key else None
+
+
+class NotificationConsumer(JsonWebsocketConsumer):
+    """Push the new notifications of the authenticated user"""
+
+    def connect(self):
+        self.user = authenticate_scope(self.scope)
+        if self.user is None:
+            # Rejects the handshake
+            self.close()
+            return
+
+        async_to_sync(self.channel_layer.group_add)(
+            group_name(self.user.pk), self.channel_name
+        )
+        self.accept()
+
+    def disconnect(self, code):
+        if getattr(self, 'user', None) is not None:
+            async_to_sync(self.channel_layer.group_discard)(
+                group_name(self.user.pk), self.channel_name
+            )
+
+    def notification_created(self, event):
+        """Send a published notification to the client"""
+
+        self.send_json(event['notification'])
+
+
+class NotificationPollConsumer(AsyncHttpConsumer):
+    """Long-poll fallback for clients that cannot keep a websocket open
+
+    Returns the notifications received after the 'after' id, waiting up to
+    'timeout' seconds for a new one when there are none yet.
+    """
+
+    MAX_TIMEOUT = 30
+    PAGE_SIZE = 100
+
+    async def handle(self, body):
+        user = await database_sync_to_async(authenticate_scope)(self.scope)
+        if user is None:
+            return await self.send_json_response(401, {
+                'detail': 'Authentication credentials were not provided.'
+            })
+
+        query = parse_qs(self.scope['query_string'].decode('latin1'))
+        try:
+            after = int(query.get('after', [0])[0])
+            timeout = min(float(query.get('timeout', [self.MAX_TIMEOUT])[0]),
+                          self.MAX_TIMEOUT)
+        except ValueError:
+            return await self.send_json_response(400, {
+                'detail': "'after' and 'timeout' must be numbers."
+            })
+
+        # Subscribe before looking so a notification committed in between
+        # is not missed.
+        channel = await self.channel_layer.new_channel()
+        group = group_name(user.pk)
+        await self.channel_layer.group_add(group, channel)
+        try:
+            notifications = await self.get_notifications(user, after)
+            if not notifications and timeout > 0:
+                try:
+                    await asyncio.wait_for(
+                        self.channel_layer.receive(channel), timeout
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    notifications = await self.get_notifications(user, after)
+        finally:
+            await self.channel_layer.group_discard(group, channel)
+
+        await self.send_json_response(200, notifications)
+
+    @database_sync_to_async
+    def get_notifications(self, user, after):
+        """Return the serialized notifications received after an id"""
+
+        notifications = Notification.objects \
+            .select_related('from_user', 'to_user') \
+            .filter(to_user=user, id__gt=after) \
+            .order_by('id')[:self.PAGE_SIZE]
+
+        return NotificationSerializer(notifications, many=True).data
+
+    async def send_json_response(self, status, data):
+        await self.send_response(status, JSONRenderer().render(data), headers=[
+            (b'Content-Type', b'application/json'),
+        ])
@@ -0,0 +1,40 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.dispatch import receiver
+
+from core.signals import notifications_created
+from notifications.serializers import NotificationSerializer
+
+
+# Type of the channel layer messages, handled by the consumers'
+# notification_created method
+MESSAGE_TYPE = 'notification.created'
+
+
+def group_name(user_id):
+    """Return the channel layer group of a user's open connections"""
+
+    return 'notifications.user.{}'.format(user_id)
+
+
+def publish(notifications):
+    """Push notifications to the open connections of their recipients"""
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    send = async_to_sync(channel_layer.group_send)
+    for notification in notifications:
+        send(group_name(notification.to_user_id), {
+            'type': MESSAGE_TYPE,
+            'notification': dict(NotificationSerializer(notification).data),
+        })
+
+
+@receiver(notifications_created)
+def push_notifications(sender, notifications, **kwargs):
+    """Publish new notifications once their transaction is committed"""
+
+    transaction.on_commit(lambda: publish(notifications))
@@ -0,0 +1,187 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import NotificationJob
+from core.signals import notifications_created
+from notifications.providers import Message
+
+
+DEFAULTS = {
+    # Provider class path of every channel, channels missing here are not
+    # enqueued at all
+    'PROVIDERS': {},
+    # Attempts before a job is given up as failed
+    'MAX_ATTEMPTS': 5,
+    # Seconds before the first retry, doubled on every further attempt
+    'RETRY_DELAY': 30,
+    'MAX_RETRY_DELAY': 3600,
+    # Seconds after which a running job is considered abandoned by a
+    # crashed worker and claimed again
+    'LOCK_TIMEOUT': 300,
+}
+
+
+def get_options():
+    """Return the dispatch settings merged with the defaults"""
+
+    return dict(DEFAULTS, **getattr(settings, 'NOTIFICATION_DISPATCH', {}))
+
+
+def get_provider(channel):
+    """Return a new provider instance of a channel"""
+
+    return import_string(get_options()['PROVIDERS'][channel])()
+
+
+def enqueue(notifications):
+    """Queue the delivery of notifications on every configured channel"""
+
+    channels = list(get_options()['PROVIDERS'])
+    NotificationJob.objects.bulk_create([
+        NotificationJob(notification=notification, channel=channel)
+        for notification in notifications
+        for channel in channels
+    ])
+
+
+@receiver(notifications_created)
+def enqueue_notifications(sender, notifications, **kwargs):
+    """Queue new notifications in the transaction creating them"""
+
+    enqueue(notifications)
+
+
+def make_message(job):
+    """Return the outbound message of a job"""
+
+    notification = job.notification
+    to_user = notification.to_user
+    to = to_user.phone_number if job.channel == NotificationJob.SMS \
+        else to_user.email
+
+    return Message(
+        to=to,
+        subject='Dabert notification',
+        body='The driver of car {} sent you notification {}.'.format(
+            notification.from_user.car_id, notification.notification
+        )
+    )
+
+
+def retry_delay(attempts):
+    """Return the backoff before the next attempt, with some jitter"""
+
+    options = get_options()
+    delay = min(options['RETRY_DELAY'] * 2 ** (attempts - 1),
+                options['MAX_RETRY_DELAY'])
+
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_jobs(batch_size):
+    """Mark a batch of due jobs as running and return them"""
+
+    now = timezone.now()
+    stale = now - timedelta(seconds=get_options()['LOCK_TIMEOUT'])
+    due = Q(status=NotificationJob.PENDING, run_after__lte=now) | \
+        Q(status=NotificationJob.RUNNING, locked_at__lt=stale)
+
+    with transaction.atomic():
+        jobs = NotificationJob.objects.filter(due)
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent workers skip each other's batches instead of
+            # waiting for them.
+            jobs = jobs.select_for_update(skip_locked=True)
+        ids = list(jobs.order_by('run_after', 'id')
+                       .values_list('id', flat=True)[:batch_size])
+
+        NotificationJob.objects.filter(due, id__in=ids).update(
+            status=NotificationJob.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1
+        )
+
+    # Without row locks another worker may have claimed some of them first
+    return list(
+        NotificationJob.objects
+        .select_related('notification__from_user', 'notification__to_user')
+        .filter(id__in=ids, status=NotificationJob.RUNNING, locked_at=now)
+    )
+
+
+def record_results(jobs, errors):
+    """Store the outcome of sent jobs, scheduling retries of failures"""
+
+    options = get_options()
+    done = [job.id for job, error in zip(jobs, errors) if error is None]
+    NotificationJob.objects.filter(id__in=done).update(
+        status=NotificationJob.DONE, last_error=''
+    )
+
+    now = timezone.now()
+    for job, error in zip(jobs, errors):
+        if error is None:
+            continue
+
+        if job.attempts >= options['MAX_ATTEMPTS']:
+            job.status = NotificationJob.FAILED
+        else:
+            job.status = NotificationJob.PENDING
+            job.run_after = now + retry_delay(job.attempts)
+        job.last_error = repr(error)
+        job.save(update_fields=['status', 'run_after', 'last_error'])
+
+
+class Dispatcher:
+    """Drains the job queue, sending the messages from a thread pool
+
+    Only the provider calls run in the pool, the database is accessed from
+    the calling thread.
+    """
+
+    def __init__(self, workers=4, batch_size=100, chunk_size=20):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+
+    def run_once(self):
+        """Send one batch of due jobs and return how many were claimed"""
+
+        jobs = claim_jobs(self.batch_size)
+
+        chunks = []
+        by_channel = {}
+        for job in jobs:
+            by_channel.setdefault(job.channel, []).append(job)
+        for channel, channel_jobs in by_channel.items():
+            for i in range(0, len(channel_jobs), self.chunk_size):
+                chunks.append((channel, channel_jobs[i:i + self.chunk_size]))
+
+        futures = [
+            (chunk, self.executor.submit(self.send_chunk, channel, chunk))
+            for channel, chunk in chunks
+        ]
+        for chunk, future in futures:
+            record_results(chunk, future.result())
+
+        return len(jobs)
+
+    def send_chunk(self, channel, jobs):
+        """Send the messages of one channel in a single provider call"""
+
+        messages = [make_message(job) for job in jobs]
+        try:
+            return get_provider(channel).send_messages(messages)
+        except Exception as exc:
+            return [exc] * len(jobs)
+
+    def close(self):
+        self.executor.shutdown()
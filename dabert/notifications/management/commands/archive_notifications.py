@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.retention import TableArchive, JsonLinesArchive, \
+                                    archive_notifications, get_cutoff
+
+
+class Command(BaseCommand):
+    """Move the expired notifications out of the notification table"""
+
+    help = ('Move the notifications older than the retention period to the '
+            'archive table or to a gzipped JSON lines file')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='retention period, by default '
+                                 'NOTIFICATION_RETENTION_DAYS')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='notifications moved in one transaction')
+        parser.add_argument('--output-dir',
+                            help='write the notifications to a file in this '
+                                 'directory instead of the archive table')
+
+    def handle(self, *args, **options):
+        directory = options['output_dir']
+        if directory is not None and not os.path.isdir(directory):
+            raise CommandError('No such directory: {}'.format(directory))
+
+        if directory is not None:
+            archive = JsonLinesArchive(directory)
+        else:
+            archive = TableArchive()
+
+        cutoff = get_cutoff(options['days'])
+        try:
+            moved = archive_notifications(archive, cutoff,
+                                          options['batch_size'])
+        finally:
+            archive.close()
+
+        self.stdout.write('Archived {} notifications created before {}'.format(
+            moved, cutoff.isoformat()
+        ))
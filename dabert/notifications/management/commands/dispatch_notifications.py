@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.dispatch import Dispatcher
+
+
+class Command(BaseCommand):
+    """Send the queued notification SMS and emails"""
+
+    help = 'Send the queued notification SMS and emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='threads sending messages concurrently')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='jobs claimed at a time')
+        parser.add_argument('--chunk-size', type=int, default=20,
+                            help='messages sent in a single provider call')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        dispatcher = Dispatcher(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size']
+        )
+
+        sent = 0
+        try:
+            while True:
+                claimed = dispatcher.run_once()
+                sent += claimed
+
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.close()
+
+        self.stdout.write('Processed {} jobs'.format(sent))
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NotificationCursorPagination(CursorPagination):
+    """Keyset pagination over the notification id
+
+    Every page is a seek on the (user, id) index instead of an OFFSET scan,
+    so a page costs the same no matter how large the inbox grows.
+    """
+
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
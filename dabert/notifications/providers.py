@@ -0,0 +1,81 @@
+from collections import namedtuple
+
+from django.core import mail
+
+
+# A single outbound message, 'to' is a phone number or an email address
+Message = namedtuple('Message', ('to', 'subject', 'body'))
+
+
+class BaseProvider:
+    """Sends the messages of one channel
+
+    Subclasses implement send() for a single message, or send_messages()
+    when the service accepts batches.
+    """
+
+    def send_messages(self, messages):
+        """Send messages and return the error of each one (None if sent)"""
+
+        errors = []
+        for message in messages:
+            try:
+                self.send(message)
+            except Exception as exc:
+                errors.append(exc)
+            else:
+                errors.append(None)
+
+        return errors
+
+    def send(self, message):
+        raise NotImplementedError(
+            'Subclasses of BaseProvider must provide a send() method.'
+        )
+
+
+class LocMemProvider(BaseProvider):
+    """Keeps the messages in memory, for the tests"""
+
+    outbox = []
+
+    def send(self, message):
+        self.outbox.append(message)
+
+
+class ConsoleProvider(BaseProvider):
+    """Prints the messages, for development"""
+
+    def send(self, message):
+        print('To: {}\n{}\n{}\n'.format(*message))
+
+
+class EmailProvider(BaseProvider):
+    """Sends the messages through the Django email backend"""
+
+    def send_messages(self, messages):
+        emails = [
+            mail.EmailMessage(message.subject, message.body, to=[message.to])
+            for message in messages
+        ]
+
+        # One connection for the whole batch
+        connection = mail.get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            return [exc] * len(emails)
+
+        errors = []
+        try:
+            for email in emails:
+                try:
+                    connection.send_messages([email])
+                except Exception as exc:
+                    errors.append(exc)
+                else:
+                    errors.append(None)
+        finally:
+            connection.close()
+
+        return errors
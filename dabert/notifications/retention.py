@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from core import versions
+from core.models import Notification, NotificationArchive, UnreadCounter
+
+
+# Columns kept of an archived notification
+FIELDS = ('id', 'from_user_id', 'to_user_id', 'notification', 'count',
+          'created_at')
+
+
+def get_cutoff(days=None):
+    """Return the creation time before which notifications are archived"""
+
+    if days is None:
+        days = settings.NOTIFICATION_RETENTION_DAYS
+
+    return timezone.now() - timedelta(days=days)
+
+
+class TableArchive:
+    """Keeps the archived notifications in the archive table"""
+
+    def write(self, rows):
+        NotificationArchive.objects.bulk_create(
+            NotificationArchive(**row) for row in rows
+        )
+
+    def close(self):
+        pass
+
+
+class JsonLinesArchive:
+    """Writes the archived notifications to a gzipped JSON lines file"""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, 'notifications-{}.jsonl.gz'.format(
+            timezone.now().strftime('%Y%m%dT%H%M%S')
+        ))
+        self.file = gzip.open(self.path, 'at', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        # The rows are deleted once this returns
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def archive_notifications(archive, cutoff, batch_size=1000):
+    """Move the notifications created before cutoff to an archive
+
+    Returns the amount moved. Every batch is its own short transaction, so
+    the table and the user cascades are never locked for long.
+    """
+
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # The created_at index finds the oldest rows without a scan, the
+            # lock keeps them from being marked read until they are gone
+            rows = list(
+                Notification.objects.select_for_update()
+                                    .filter(created_at__lt=cutoff)
+                                    .order_by('created_at')
+                                    .values(*FIELDS, 'is_read')[:batch_size]
+            )
+            if not rows:
+                return moved
+
+            unread = Counter(
+                row['to_user_id'] for row in rows if not row.pop('is_read')
+            )
+            archive.write(rows)
+            # Their delivery jobs are deleted along
+            Notification.objects.filter(
+                id__in=[row['id'] for row in rows]
+            ).delete()
+            UnreadCounter.objects.add(
+                {user_id: -count for user_id, count in unread.items()}
+            )
+            versions.bump(*{
+                row[field] for row in rows
+                for field in ('from_user_id', 'to_user_id')
+            })
+
+        moved += len(rows)
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from notifications import consumers
+
+
+websocket_urlpatterns = [
+    path('ws/notifications/', consumers.NotificationConsumer),
+]
+
+http_urlpatterns = [
+    path('api/notifications/poll/', consumers.NotificationPollConsumer),
+]
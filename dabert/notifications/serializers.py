@@ -0,0 +1,126 @@
+from rest_framework import serializers
+
+from core.models import Notification, UnreadCounter
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Serializer of the notification model"""
+
+    from_car_id = serializers.CharField(
+        source='from_user.car_id', read_only=True
+    )
+    to_car_id = serializers.CharField(source='to_user.car_id', read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ('id', 'from_car_id', 'to_car_id', 'notification', 'count',
+                  'is_read', 'created_at')
+        read_only_fields = fields
+
+
+class NotificationRowSerializer:
+    """Read-only serializer of notification rows fetched with .values()
+
+    Produces the same output as NotificationSerializer from plain dicts,
+    without model instances or the per instance field introspection of a
+    ModelSerializer, for the high-traffic list endpoints.
+    """
+
+    # Output field -> values() lookup
+    FIELDS = (
+        ('id', 'id'),
+        ('from_car_id', 'from_user__car_id'),
+        ('to_car_id', 'to_user__car_id'),
+        ('notification', 'notification'),
+        ('count', 'count'),
+        ('is_read', 'is_read'),
+        ('created_at', 'created_at'),
+    )
+
+    created_at = serializers.DateTimeField()
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def values(cls, queryset):
+        """Return the queryset rows this serializer takes"""
+
+        return queryset.values(*(lookup for name, lookup in cls.FIELDS))
+
+    def to_representation(self, row):
+        data = {name: row[lookup] for name, lookup in self.FIELDS}
+        data['created_at'] = self.created_at.to_representation(
+            data['created_at']
+        )
+        return data
+
+    @property
+    def data(self):
+        return [self.to_representation(row) for row in self.rows]
+
+
+class BulkNotificationSerializer(serializers.Serializer):
+    """Serializer for sending one notification to many car ids"""
+
+    MAX_CAR_IDS = 100
+
+    car_ids = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False
+    )
+    notification = serializers.IntegerField()
+
+    def validate_car_ids(self, value):
+        """Validate the amount of car ids in a single request"""
+
+        if len(value) > self.MAX_CAR_IDS:
+            msg = 'Ensure this field has no more than {} elements.'.format(
+                self.MAX_CAR_IDS
+            )
+            raise serializers.ValidationError(msg)
+
+        return value
+
+    def create(self, validated_data):
+        """Send the notifications and return the per car id report"""
+
+        report = Notification.objects.bulk_notify(
+            from_user=self.context['request'].user,
+            car_ids=validated_data['car_ids'],
+            notification=validated_data['notification']
+        )
+
+        return {
+            'notification': validated_data['notification'],
+            'results': report,
+        }
+
+    def to_representation(self, instance):
+        """Return the report as is"""
+
+        return instance
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """Serializer for marking the received notifications read up to an id"""
+
+    up_to_id = serializers.IntegerField(min_value=1)
+
+    def create(self, validated_data):
+        """Mark the notifications read and return the counts"""
+
+        user = self.context['request'].user
+        marked = Notification.objects.mark_read(
+            user, validated_data['up_to_id']
+        )
+
+        return {
+            'marked': marked,
+            'unread': UnreadCounter.objects.get_unread(user),
+        }
+
+    def to_representation(self, instance):
+        """Return the counts as is"""
+
+        return instance
@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Notification
+from dabert.routing import application
+
+
+WEBSOCKET_PATH = '/ws/notifications/'
+POLL_PATH = '/api/notifications/poll/'
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class NotificationDeliveryTests(TransactionTestCase):
+    """Test pushing the new notifications to their recipients
+
+    The consumers query the database from worker threads, so the test data
+    has to be committed.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+        self.sender = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        self.recipient = create_user(
+            car_id="987-654-321",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+        self.token = Token.objects.create(user=self.recipient)
+
+    def notify(self):
+        return Notification.objects.bulk_notify(
+            self.sender, [self.recipient.car_id], 1
+        )
+
+    async def poll(self, query_string, headers=None):
+        communicator = HttpCommunicator(
+            application, 'GET', '{}?{}'.format(POLL_PATH, query_string),
+            headers=headers or []
+        )
+        return await communicator.get_response(timeout=5)
+
+    def test_websocket_requires_token(self):
+        """Test that a connection without a valid token is rejected"""
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                application, WEBSOCKET_PATH + '?token=invalid'
+            )
+            connected, _ = await communicator.connect()
+            return connected
+
+        self.assertFalse(async_to_sync(run)())
+
+    def test_websocket_receives_notification(self):
+        """Test that a new notification is pushed to the recipient"""
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                application, WEBSOCKET_PATH,
+                headers=[(b'authorization',
+                          'Token {}'.format(self.token.key).encode())]
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            await database_sync_to_async(self.notify)()
+            message = await communicator.receive_json_from(timeout=1)
+            await communicator.disconnect()
+
+            return message
+
+        message = async_to_sync(run)()
+
+        notification = Notification.objects.get()
+        self.assertEqual(message['id'], notification.id)
+        self.assertEqual(message['from_car_id'], self.sender.car_id)
+        self.assertEqual(message['to_car_id'], self.recipient.car_id)
+        self.assertEqual(message['notification'], 1)
+
+    def test_poll_requires_token(self):
+        """Test that the long-poll requires authentication"""
+
+        response = async_to_sync(self.poll)('timeout=0')
+
+        self.assertEqual(response['status'], 401)
+
+    def test_poll_returns_pending_notifications(self):
+        """Test that existing notifications are returned immediately"""
+
+        self.notify()
+
+        response = async_to_sync(self.poll)(
+            'after=0&token={}'.format(self.token.key)
+        )
+
+        self.assertEqual(response['status'], 200)
+        self.assertEqual(len(json.loads(response['body'])), 1)
+
+    def test_poll_times_out_empty(self):
+        """Test that a poll without notifications returns an empty list"""
+
+        response = async_to_sync(self.poll)(
+            'timeout=0.1&token={}'.format(self.token.key)
+        )
+
+        self.assertEqual(response['status'], 200)
+        self.assertEqual(json.loads(response['body']), [])
+
+    def test_poll_wakes_up_on_new_notification(self):
+        """Test that a waiting poll returns a notification sent meanwhile"""
+
+        async def run():
+            poll = asyncio.ensure_future(self.poll(
+                'timeout=5', headers=[
+                    (b'authorization',
+                     'Token {}'.format(self.token.key).encode())
+                ]
+            ))
+            # Let the poll subscribe before the notification is sent
+            await asyncio.sleep(0.2)
+            await database_sync_to_async(self.notify)()
+
+            return await poll
+
+        response = async_to_sync(run)()
+
+        body = json.loads(response['body'])
+        self.assertEqual(len(body), 1)
+        self.assertEqual(body[0]['from_car_id'], self.sender.car_id)
@@ -0,0 +1,141 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Notification, NotificationJob
+from notifications.dispatch import Dispatcher
+from notifications.providers import LocMemProvider
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class NotificationDispatchTests(TestCase):
+    """Test the outbound notification queue and its worker"""
+
+    def setUp(self):
+        LocMemProvider.outbox = []
+
+        self.sender = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        self.recipient = create_user(
+            car_id="987-654-321",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+
+    def notify(self):
+        Notification.objects.bulk_notify(
+            self.sender, [self.recipient.car_id], 7
+        )
+
+    def dispatch(self):
+        call_command('dispatch_notifications', '--once', stdout=StringIO())
+
+    def test_notification_enqueues_jobs(self):
+        """Test that a new notification queues a job per channel"""
+
+        self.notify()
+
+        jobs = NotificationJob.objects.all()
+        self.assertEqual(
+            sorted(job.channel for job in jobs),
+            [NotificationJob.EMAIL, NotificationJob.SMS]
+        )
+        self.assertTrue(
+            all(job.status == NotificationJob.PENDING for job in jobs)
+        )
+
+    def test_worker_sends_messages(self):
+        """Test that the worker sends the queued messages"""
+
+        self.notify()
+
+        self.dispatch()
+
+        self.assertEqual(
+            sorted(message.to for message in LocMemProvider.outbox),
+            sorted([self.recipient.email, self.recipient.phone_number])
+        )
+        self.assertIn(self.sender.car_id, LocMemProvider.outbox[0].body)
+        self.assertFalse(NotificationJob.objects.exclude(
+            status=NotificationJob.DONE
+        ).exists())
+
+    def test_worker_skips_future_jobs(self):
+        """Test that a job is not sent before its run_after time"""
+
+        self.notify()
+        NotificationJob.objects.update(
+            run_after=timezone.now() + timedelta(minutes=1)
+        )
+
+        self.dispatch()
+
+        self.assertEqual(LocMemProvider.outbox, [])
+
+    def test_failed_job_is_retried_later(self):
+        """Test that a failing job is rescheduled with a backoff"""
+
+        self.notify()
+
+        with mock.patch.object(LocMemProvider, 'send',
+                               side_effect=IOError('unreachable')):
+            self.dispatch()
+
+        for job in NotificationJob.objects.all():
+            self.assertEqual(job.status, NotificationJob.PENDING)
+            self.assertEqual(job.attempts, 1)
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertIn('unreachable', job.last_error)
+
+    def test_failed_job_gives_up(self):
+        """Test that a job failing too many times is marked as failed"""
+
+        self.notify()
+        NotificationJob.objects.update(attempts=4)
+
+        with mock.patch.object(LocMemProvider, 'send',
+                               side_effect=IOError('unreachable')):
+            self.dispatch()
+
+        self.assertFalse(NotificationJob.objects.exclude(
+            status=NotificationJob.FAILED
+        ).exists())
+
+    def test_abandoned_job_is_claimed_again(self):
+        """Test that a job left running by a crashed worker is resent"""
+
+        self.notify()
+        NotificationJob.objects.update(
+            status=NotificationJob.RUNNING,
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.dispatch()
+
+        self.assertEqual(len(LocMemProvider.outbox), 2)
+
+    def test_worker_claims_in_batches(self):
+        """Test that a run claims at most one batch of jobs"""
+
+        self.notify()
+
+        dispatcher = Dispatcher(workers=2, batch_size=1)
+        try:
+            self.assertEqual(dispatcher.run_once(), 1)
+            self.assertEqual(dispatcher.run_once(), 1)
+            self.assertEqual(dispatcher.run_once(), 0)
+        finally:
+            dispatcher.close()
@@ -1,12 +1,27 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django.settings import get_user_model
+from django.contrib.auth import get_user_model
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.models import Notification, UnreadCounter, Vehicle
+from notifications.serializers import NotificationSerializer, \
+                                      NotificationRowSerializer
+
 
 NOTIFICATIONS_URL = reverse('notifications:notification-list')
+SENT_NOTIFICATIONS_URL = reverse('notifications:notification-sent')
+BULK_NOTIFICATIONS_URL = reverse('notifications:notification-bulk')
+UNREAD_NOTIFICATIONS_URL = reverse('notifications:notification-unread')
+READ_NOTIFICATIONS_URL = reverse('notifications:notification-read')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
 
 
 class PublicNotificationsApiTests(TestCase):
@@ -21,7 +36,7 @@ class PublicNotificationsApiTests(TestCase):
         res = self.client.get(NOTIFICATIONS_URL)
 
         # Check that the request is unauthotized
-        self.assertEqual(res.status, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
 class PrivateNotificationsApiTests(TestCase):
@@ -40,6 +55,14 @@ class PrivateNotificationsApiTests(TestCase):
         # Create the user
         self.user = get_user_model().objects.create_user(**payload)
 
+        # Create another user to exchange notifications with
+        self.other_user = create_user(
+            car_id="987-654-321",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+
         # Create the API to use.
         self.client = APIClient()
 
@@ -52,4 +75,460 @@ class PrivateNotificationsApiTests(TestCase):
         res = self.client.get(NOTIFICATIONS_URL)
 
         # Result code for request is success
-        self.assertEqual(res.status, status_code.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+
+    def test_notifications_limited_to_received(self):
+        """Test that only the notifications sent to the user are listed"""
+
+        received = Notification.objects.create(
+            from_user=self.other_user, to_user=self.user, notification=1
+        )
+        Notification.objects.create(
+            from_user=self.user, to_user=self.other_user, notification=2
+        )
+
+        res = self.client.get(NOTIFICATIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['id'], received.id)
+        self.assertEqual(
+            res.data['results'][0]['from_car_id'], self.other_user.car_id
+        )
+
+    def test_sent_notifications_limited_to_sent(self):
+        """Test that the sent box lists only the user's own notifications"""
+
+        Notification.objects.create(
+            from_user=self.other_user, to_user=self.user, notification=1
+        )
+        sent = Notification.objects.create(
+            from_user=self.user, to_user=self.other_user, notification=2
+        )
+
+        res = self.client.get(SENT_NOTIFICATIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['id'], sent.id)
+        self.assertEqual(
+            res.data['results'][0]['to_car_id'], self.other_user.car_id
+        )
+
+    def test_row_serializer_matches_model_serializer(self):
+        """Test that the rows serialize like the model instances"""
+
+        Notification.objects.bulk_notify(
+            self.other_user, [self.user.car_id], 1
+        )
+        queryset = Notification.objects.all()
+
+        self.assertEqual(
+            NotificationRowSerializer(
+                NotificationRowSerializer.values(queryset)
+            ).data,
+            NotificationSerializer(queryset, many=True).data
+        )
+
+    def test_notifications_not_modified(self):
+        """Test that a list stays 304 until a new notification arrives"""
+
+        cache.clear()
+        etag = self.client.get(NOTIFICATIONS_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(NOTIFICATIONS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Notification.objects.bulk_notify(
+            self.other_user, [self.user.car_id], 1
+        )
+        res = self.client.get(NOTIFICATIONS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_notifications_cursor_pagination(self):
+        """Test that the inbox is paged newest first by a cursor"""
+
+        notifications = [
+            Notification.objects.create(
+                from_user=self.other_user, to_user=self.user, notification=i
+            )
+            for i in range(5)
+        ]
+
+        res = self.client.get(NOTIFICATIONS_URL, {'page_size': 3})
+        first_page = [n['id'] for n in res.data['results']]
+
+        res = self.client.get(res.data['next'])
+        second_page = [n['id'] for n in res.data['results']]
+
+        expected = [n.id for n in reversed(notifications)]
+        self.assertEqual(first_page, expected[:3])
+        self.assertEqual(second_page, expected[3:])
+        self.assertIsNone(res.data['next'])
+
+    def test_notifications_query_count_is_constant(self):
+        """Test that listing does not load the users row by row"""
+
+        for i in range(10):
+            Notification.objects.create(
+                from_user=self.other_user, to_user=self.user, notification=i
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(NOTIFICATIONS_URL)
+
+        self.assertEqual(len(res.data['results']), 10)
+        self.assertEqual(len(queries), 1)
+
+
+class BulkNotificationsApiTests(TestCase):
+    """Test sending a notification to many car ids at once"""
+
+    def setUp(self):
+        self.user = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        self.recipients = [
+            create_user(
+                car_id="000-000-00{}".format(i),
+                email="user{}@email.com".format(i),
+                phone_number="050000000{}".format(i),
+                password="password"
+            )
+            for i in range(3)
+        ]
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_notification_login_required(self):
+        """Test that sending notifications requires authentication"""
+
+        res = APIClient().post(BULK_NOTIFICATIONS_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_notification_report(self):
+        """Test that every car id gets a result and only valid ones a row"""
+
+        car_ids = [user.car_id for user in self.recipients]
+        payload = {
+            'car_ids': car_ids + ["404", car_ids[0], self.user.car_id],
+            'notification': 3
+        }
+
+        res = self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['notification'], 3)
+        self.assertEqual(
+            [result['status'] for result in res.data['results']],
+            [Notification.SENT] * 3 + [
+                Notification.NOT_FOUND,
+                Notification.DUPLICATE,
+                Notification.SELF
+            ]
+        )
+
+        notifications = Notification.objects.filter(from_user=self.user)
+        self.assertEqual(
+            sorted(n.to_user_id for n in notifications),
+            sorted(user.id for user in self.recipients)
+        )
+        self.assertTrue(all(n.notification == 3 for n in notifications))
+
+    def test_bulk_notification_to_vehicles(self):
+        """Test that every vehicle of a user reaches the user once"""
+
+        recipient = self.recipients[0]
+        Vehicle.objects.create(user=recipient, car_id="11-222-33")
+        payload = {
+            'car_ids': ["11-222-33", recipient.car_id],
+            'notification': 1
+        }
+
+        res = self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        self.assertEqual(
+            [result['status'] for result in res.data['results']],
+            [Notification.SENT, Notification.DUPLICATE]
+        )
+        self.assertEqual(
+            Notification.objects.get(from_user=self.user).to_user, recipient
+        )
+
+    def test_bulk_notification_single_insert(self):
+        """Test that the recipients are resolved and inserted at once"""
+
+        payload = {
+            'car_ids': [user.car_id for user in self.recipients],
+            'notification': 1
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        statements = [query['sql'] for query in queries]
+        user_selects = [
+            sql for sql in statements
+            if sql.startswith('SELECT') and 'FROM "core_vehicle"' in sql
+        ]
+        inserts = [
+            sql for sql in statements
+            if sql.startswith('INSERT INTO "core_notification"')
+        ]
+        self.assertEqual(len(user_selects), 1)
+        self.assertEqual(len(inserts), 1)
+
+    def test_bulk_notification_too_many_car_ids(self):
+        """Test that a request is limited in the amount of car ids"""
+
+        payload = {
+            'car_ids': [str(i) for i in range(101)],
+            'notification': 1
+        }
+
+        res = self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_bulk_notification_empty_car_ids(self):
+        """Test that at least one car id is required"""
+
+        payload = {'car_ids': [], 'notification': 1}
+
+        res = self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_notification_coalesced(self):
+        """Test that repeats of a code to a recipient count on one row"""
+
+        other = create_user(
+            car_id="111-111-111",
+            email="other@email.com",
+            phone_number="0511111111",
+            password="password"
+        )
+        payload = {'car_ids': [self.recipients[0].car_id], 'notification': 1}
+        self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        # Another driver blocked by the same car
+        client = APIClient()
+        client.force_authenticate(other)
+        res = client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['results'][0]['status'],
+                         Notification.COALESCED)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.from_user, self.user)
+        self.assertEqual(notification.count, 2)
+        # Only the first one was queued for SMS and email delivery
+        self.assertEqual(notification.jobs.count(), 2)
+
+    @override_settings(NOTIFICATION_COALESCING={'WINDOW': 60,
+                                                'SCOPE': 'sender'})
+    def test_bulk_notification_coalesced_per_sender(self):
+        """Test that the sender scope keeps the senders' rows apart"""
+
+        other = create_user(
+            car_id="111-111-111",
+            email="other@email.com",
+            phone_number="0511111111",
+            password="password"
+        )
+        payload = {'car_ids': [self.recipients[0].car_id], 'notification': 1}
+        for user in (self.user, other, other):
+            client = APIClient()
+            client.force_authenticate(user)
+            client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        self.assertEqual(
+            sorted(Notification.objects.values_list('count', flat=True)),
+            [1, 2]
+        )
+
+    @override_settings(NOTIFICATION_COALESCING={'WINDOW': 0})
+    def test_bulk_notification_coalescing_disabled(self):
+        """Test that every notification gets a row without a window"""
+
+        payload = {'car_ids': [self.recipients[0].car_id], 'notification': 1}
+        for _ in range(2):
+            self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+
+        self.assertEqual(Notification.objects.count(), 2)
+
+    @override_settings(THROTTLING={'RATES': {'notify_car_id': '1/h'}})
+    def test_bulk_notification_throttled_per_car(self):
+        """Test that the notifications to the same car are limited"""
+
+        cache.clear()
+        payload = {'car_ids': [self.recipients[0].car_id], 'notification': 1}
+
+        res = self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Other cars are still reachable
+        payload['car_ids'] = [self.recipients[1].car_id]
+        res = self.client.post(BULK_NOTIFICATIONS_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+
+class UnreadNotificationsApiTests(TestCase):
+    """Test the unread counter and marking notifications read"""
+
+    def setUp(self):
+        self.sender = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        self.user = create_user(
+            car_id="987-654-321",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+        for notification in range(3):
+            Notification.objects.bulk_notify(
+                self.sender, [self.user.car_id], notification
+            )
+        self.ids = list(Notification.objects.order_by('id')
+                                            .values_list('id', flat=True))
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unread_count(self):
+        """Test that the unread count is read from the counter alone"""
+
+        with self.assertNumQueries(1):
+            res = self.client.get(UNREAD_NOTIFICATIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'unread': 3})
+        self.assertEqual(UnreadCounter.objects.get_unread(self.sender), 0)
+
+    def test_mark_read_up_to_id(self):
+        """Test that the notifications up to an id are marked at once"""
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(READ_NOTIFICATIONS_URL,
+                                   {'up_to_id': self.ids[1]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'marked': 2, 'unread': 1})
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "core_notification"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(Notification.objects.order_by('id')
+                                     .values_list('is_read', flat=True)),
+            [True, True, False]
+        )
+
+        # Marking them again changes nothing
+        res = self.client.post(READ_NOTIFICATIONS_URL,
+                               {'up_to_id': self.ids[1]})
+
+        self.assertEqual(res.data, {'marked': 0, 'unread': 1})
+
+    def test_mark_read_only_received(self):
+        """Test that the notifications of other users are not marked"""
+
+        self.client.force_authenticate(self.sender)
+
+        res = self.client.post(READ_NOTIFICATIONS_URL,
+                               {'up_to_id': self.ids[-1]})
+
+        self.assertEqual(res.data, {'marked': 0, 'unread': 0})
+        self.assertEqual(UnreadCounter.objects.get_unread(self.user), 3)
+
+    def test_mark_read_invalid_id(self):
+        """Test that an id is required"""
+
+        res = self.client.post(READ_NOTIFICATIONS_URL, {'up_to_id': 0})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_read_changes_sender_sent_list(self):
+        """Test that the sender's sent list is not 304 once it is read"""
+
+        cache.clear()
+        sender_client = APIClient()
+        sender_client.force_authenticate(self.sender)
+        etag = sender_client.get(SENT_NOTIFICATIONS_URL)['ETag']
+
+        self.client.post(READ_NOTIFICATIONS_URL, {'up_to_id': self.ids[-1]})
+        res = sender_client.get(SENT_NOTIFICATIONS_URL,
+                                HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(all(row['is_read'] for row in res.data['results']))
+
+    @override_settings(NOTIFICATION_COALESCING={'WINDOW': 60})
+    def test_coalesced_repeat_changes_sender_sent_list(self):
+        """Test that a repeat from another sender changes the first
+        sender's sent list"""
+
+        cache.clear()
+        Notification.objects.bulk_notify(self.sender, [self.user.car_id], 9)
+        sender_client = APIClient()
+        sender_client.force_authenticate(self.sender)
+        etag = sender_client.get(SENT_NOTIFICATIONS_URL)['ETag']
+
+        other = create_user(
+            car_id="111-111-111",
+            email="third@email.com",
+            phone_number="0511111111",
+            password="password"
+        )
+        Notification.objects.bulk_notify(other, [self.user.car_id], 9)
+        res = sender_client.get(SENT_NOTIFICATIONS_URL,
+                                HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['count'], 2)
+
+    def test_sender_car_id_change_changes_inbox(self):
+        """Test that the inbox is not 304 once the sender's car id changed"""
+
+        cache.clear()
+        etag = self.client.get(NOTIFICATIONS_URL)['ETag']
+
+        sender_client = APIClient()
+        sender_client.force_authenticate(self.sender)
+        sender_client.patch(reverse('user:me'), {'car_id': "12-345-67"})
+        res = self.client.get(NOTIFICATIONS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['from_car_id'], "12-345-67")
+
+    @override_settings(NOTIFICATION_COALESCING={'WINDOW': 60})
+    def test_coalesced_repeat_is_unread(self):
+        """Test that a repeat of a read notification is unread again"""
+
+        Notification.objects.bulk_notify(self.sender, [self.user.car_id], 9)
+        Notification.objects.mark_read(self.user, max(
+            Notification.objects.values_list('id', flat=True)
+        ))
+
+        Notification.objects.bulk_notify(self.sender, [self.user.car_id], 9)
+
+        self.assertEqual(UnreadCounter.objects.get_unread(self.user), 1)
+        self.assertFalse(Notification.objects.get(notification=9).is_read)
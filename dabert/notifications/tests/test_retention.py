@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Notification, NotificationArchive, NotificationJob, \
+                        UnreadCounter
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class NotificationRetentionTests(TestCase):
+    """Test moving the expired notifications out of the hot table"""
+
+    def setUp(self):
+        self.sender = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        self.recipient = create_user(
+            car_id="987-654-321",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+
+        self.old = []
+        for days in (100, 95, 91):
+            notification = Notification.objects.create(
+                from_user=self.sender, to_user=self.recipient, notification=1
+            )
+            # created_at is set on insert
+            Notification.objects.filter(pk=notification.pk).update(
+                created_at=timezone.now() - timedelta(days=days)
+            )
+            self.old.append(notification)
+        self.recent = Notification.objects.create(
+            from_user=self.sender, to_user=self.recipient, notification=2
+        )
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_notifications', *args, stdout=out)
+        return out.getvalue()
+
+    def test_archive_to_table(self):
+        """Test that the expired notifications are moved in batches"""
+
+        NotificationJob.objects.create(notification=self.old[0],
+                                       channel=NotificationJob.SMS)
+
+        out = self.archive('--days', '90', '--batch-size', '2')
+
+        self.assertIn('Archived 3 notifications', out)
+        self.assertEqual(list(Notification.objects.all()), [self.recent])
+        self.assertFalse(NotificationJob.objects.exists())
+        self.assertEqual(
+            sorted(NotificationArchive.objects.values_list('id', flat=True)),
+            sorted(notification.id for notification in self.old)
+        )
+
+    def test_archive_updates_unread_counter(self):
+        """Test that archived unread notifications leave the unread count"""
+
+        Notification.objects.filter(pk=self.old[0].pk).update(is_read=True)
+        UnreadCounter.objects.filter(user=self.recipient).update(unread=3)
+
+        self.archive('--days', '90')
+
+        self.assertEqual(UnreadCounter.objects.get_unread(self.recipient), 1)
+
+    def test_archive_survives_user_delete(self):
+        """Test that deleting a user keeps its archived notifications"""
+
+        self.archive('--days', '90')
+        self.sender.delete()
+
+        self.assertEqual(NotificationArchive.objects.count(), 3)
+
+    def test_archive_to_jsonl(self):
+        """Test that the expired notifications can go to a gzipped file"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.archive('--days', '90', '--output-dir', directory)
+
+            name, = os.listdir(directory)
+            with gzip.open(os.path.join(directory, name), 'rt') as f:
+                rows = [json.loads(line) for line in f]
+
+        self.assertEqual(sorted(row['id'] for row in rows),
+                         sorted(notification.id for notification in self.old))
+        self.assertEqual(rows[0]['to_user_id'], self.recipient.id)
+        self.assertFalse(NotificationArchive.objects.exists())
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+
+from core.throttling import SlidingWindowThrottle, UserThrottle
+from notifications.serializers import BulkNotificationSerializer
+
+
+class NotifyThrottle(UserThrottle):
+    """Throttle the notification requests of a user"""
+
+    scope = 'notify'
+
+
+class NotifyCarIdThrottle(SlidingWindowThrottle):
+    """Throttle the notifications a user sends to the same car"""
+
+    scope = 'notify_car_id'
+
+    def get_idents(self, request, view):
+        car_ids = request.data.get('car_ids')
+        # Invalid lists are rejected by the serializer right after
+        if not request.user.is_authenticated or \
+                not isinstance(car_ids, list) or \
+                len(car_ids) > BulkNotificationSerializer.MAX_CAR_IDS:
+            return []
+
+        normalize_plate = get_user_model().objects.normalize_plate
+        plates = {
+            normalize_plate(car_id) for car_id in car_ids
+            if isinstance(car_id, str)
+        }
+        return [
+            '{}:{}'.format(request.user.pk, plate)
+            for plate in plates if plate
+        ]
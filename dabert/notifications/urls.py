@@ -0,0 +1,14 @@
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+
+from notifications import views
+
+
+router = SimpleRouter()
+router.register('', views.NotificationViewSet, base_name='notification')
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
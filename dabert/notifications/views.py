@@ -1,5 +1,103 @@
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from core.models import Notification
+from core.idempotency import IdempotentMixin
+from core.models import Notification, UnreadCounter
+from core.versions import ConditionalGetMixin
+from user.authentication import CachedTokenAuthentication
+from notifications.pagination import NotificationCursorPagination
+from notifications.serializers import NotificationSerializer, \
+                                      NotificationRowSerializer, \
+                                      BulkNotificationSerializer, \
+                                      MarkReadSerializer
+from notifications.throttling import NotifyThrottle, NotifyCarIdThrottle
+
+
+class NotificationViewSet(ConditionalGetMixin, IdempotentMixin,
+                          mixins.ListModelMixin, viewsets.GenericViewSet):
+    """List the notifications of the authenticated user"""
+
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationCursorPagination
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    queryset = Notification.objects.select_related('from_user', 'to_user')
+
+    def get_serializer_class(self):
+        """Return the serializer class for the request"""
+
+        if self.action == 'bulk':
+            return BulkNotificationSerializer
+
+        if self.action == 'read':
+            return MarkReadSerializer
+
+        return self.serializer_class
+
+    def get_queryset(self):
+        """Return the received notifications, or the sent ones for 'sent'"""
+
+        if self.action == 'sent':
+            return self.queryset.filter(from_user=self.request.user)
+
+        return self.queryset.filter(to_user=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        """List the notifications, or 304 when the client's copy is current"""
+
+        return self.conditional(self.list_rows, request, *args, **kwargs)
+
+    def list_rows(self, request, *args, **kwargs):
+        """List the notifications serialized straight from their rows"""
+
+        rows = NotificationRowSerializer.values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(rows)
+
+        return self.get_paginated_response(
+            NotificationRowSerializer(page).data
+        )
+
+    @action(detail=False, methods=['get'])
+    def sent(self, request):
+        """List the notifications sent by the authenticated user"""
+
+        return self.list(request)
+
+    @action(detail=False, methods=['post'],
+            throttle_classes=(NotifyThrottle, NotifyCarIdThrottle))
+    def bulk(self, request):
+        """Send a notification to many car ids at once"""
+
+        return self.idempotent(self.send_bulk, request)
+
+    def send_bulk(self, request):
+        """Send the notification and return the per car id report"""
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def unread(self, request):
+        """Return the amount of unread notifications, for badges"""
+
+        # A primary key read of the counter, whatever the inbox size
+        return Response(
+            {'unread': UnreadCounter.objects.get_unread(request.user)}
+        )
+
+    @action(detail=False, methods=['post'])
+    def read(self, request):
+        """Mark the received notifications read up to an id"""
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data)
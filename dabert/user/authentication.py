@@ -0,0 +1,102 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.metrics import registry
+
+
+DEFAULTS = {
+    # Alias of the Django cache holding the token snapshots
+    'CACHE_ALIAS': 'default',
+    # Seconds a token snapshot is trusted
+    'TIMEOUT': 300,
+}
+
+KEY_PREFIX = 'authtoken'
+
+
+def get_options():
+    """Return the token cache settings merged with the defaults"""
+
+    return dict(DEFAULTS, **getattr(settings, 'AUTH_TOKEN_CACHE', {}))
+
+
+def get_cache():
+    """Return the Django cache holding the token snapshots"""
+
+    return caches[get_options()['CACHE_ALIAS']]
+
+
+def make_key(token_key):
+    """Return the cache key of a token, without exposing the token itself"""
+
+    digest = hashlib.sha256(token_key.encode('utf-8')).hexdigest()
+    return '{}:{}'.format(KEY_PREFIX, digest)
+
+
+def invalidate_tokens(*token_keys):
+    """Drop the cached snapshots of the given tokens"""
+
+    if token_keys:
+        get_cache().delete_many([make_key(key) for key in token_keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that keeps token to user snapshots in a cache
+
+    Drop-in replacement for TokenAuthentication that skips the token and
+    user query while a snapshot is cached. Snapshots are dropped when the
+    token is deleted or the user is saved (see user.signals).
+
+    A snapshot holds the user id and active flag only, never the password
+    hash or the rest of the row. The user it authenticates has every other
+    field deferred, views reading or writing them load the user first.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_cache()
+        cache_key = make_key(key)
+
+        snapshot = cache.get(cache_key)
+        registry.record_cache('auth_token', hits=int(snapshot is not None),
+                              misses=int(snapshot is None))
+        if snapshot is not None:
+            return self.restore(snapshot)
+
+        # Inactive users and unknown tokens raise and are never cached
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, {
+            'user_id': user.pk,
+            'is_active': user.is_active,
+            'token_key': token.key,
+        }, get_options()['TIMEOUT'])
+
+        return user, token
+
+    def restore(self, snapshot):
+        """Return the user and token of a snapshot, other fields deferred"""
+
+        user = get_user_model().from_db(
+            None, ['id', 'is_active'],
+            [snapshot['user_id'], snapshot['is_active']]
+        )
+        token = Token.from_db(None, ['key', 'user_id'],
+                              [snapshot['token_key'], snapshot['user_id']])
+
+        return user, token
+
+
+def authenticate_token(key):
+    """Return the active user of a token key, or None when it is invalid"""
+
+    try:
+        user, token = CachedTokenAuthentication().authenticate_credentials(key)
+    except AuthenticationFailed:
+        return None
+
+    return user
@@ -0,0 +1,259 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+
+from core.models import UnreadCounter, Vehicle
+
+
+UNIQUE_FIELDS = ('plate', 'email', 'phone_number')
+# Column of every unique field, a plate is taken by any vehicle with it
+COLUMNS = {
+    'plate': 'vehicles__plate',
+    'email': 'email',
+    'phone_number': 'phone_number',
+}
+
+
+def describe(user, field):
+    """Return the field and value a uniqueness error is reported with"""
+
+    # A plate is unique, but the file holds the car id it comes from
+    if field == 'plate':
+        field = 'car_id'
+    return '{} {}'.format(field, getattr(user, field))
+
+
+def init_worker(settings_module):
+    """Configure Django in a hashing process started without fork"""
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def read_rows(path, file_format):
+    """Yield the (line number, row dict) of a CSV or JSON lines file"""
+
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            # Line 1 holds the header
+            for number, row in enumerate(csv.DictReader(f), start=2):
+                yield number, row
+            return
+
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = exc
+            yield number, row
+
+
+def chunked(iterable, size):
+    """Yield lists of at most size items"""
+
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+class Command(BaseCommand):
+    """Create users in bulk from a CSV or JSON lines file"""
+
+    help = ('Create users in bulk from a CSV or JSON lines file with the '
+            'car_id, email, phone_number and password fields')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON lines file')
+        parser.add_argument('--format', choices=('csv', 'jsonl'),
+                            help='file format, by default from the extension')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='rows validated and inserted at a time')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='processes hashing the passwords, 1 to hash '
+                                 'in this process')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='validate the rows without creating users')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError('No such file: {}'.format(path))
+
+        file_format = options['format'] or \
+            ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+
+        self.model = get_user_model()
+        self.dry_run = options['dry_run']
+        # Values of the file already seen, to reject duplicates within it
+        self.seen = {field: set() for field in UNIQUE_FIELDS}
+        self.created = 0
+        self.errors = 0
+
+        executor = None
+        if options['workers'] > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=init_worker,
+                initargs=(os.environ['DJANGO_SETTINGS_MODULE'],)
+            )
+
+        try:
+            rows = read_rows(path, file_format)
+            for chunk in chunked(rows, options['chunk_size']):
+                self.import_chunk(chunk, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write('{} {} users, {} rows with errors'.format(
+            'Validated' if self.dry_run else 'Imported',
+            self.created,
+            self.errors
+        ))
+
+    def report(self, number, message):
+        """Report an invalid row"""
+
+        self.errors += 1
+        self.stdout.write('Line {}: {}'.format(number, message))
+
+    def import_chunk(self, chunk, executor):
+        """Validate, hash and insert one chunk of rows"""
+
+        valid = []
+        for number, row in chunk:
+            try:
+                user, password = self.build_user(row)
+            except ValidationError as exc:
+                self.report(number, '; '.join(exc.messages))
+            else:
+                valid.append((number, user, password))
+
+        valid = self.exclude_existing(valid)
+        if not valid:
+            return
+
+        if self.dry_run:
+            # Nothing is saved, the passwords need no hashing
+            self.created += len(valid)
+            return
+
+        passwords = [password for number, user, password in valid]
+        if executor is not None:
+            hashes = executor.map(make_password, passwords,
+                                  chunksize=max(1, len(passwords) // 16))
+        else:
+            hashes = map(make_password, passwords)
+        for (number, user, password), encoded in zip(valid, hashes):
+            user.password = encoded
+
+        users = [user for number, user, password in valid]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(users)
+                vehicles = Vehicle.objects.create_for_users(users)
+                UnreadCounter.objects.bulk_create(
+                    UnreadCounter(user_id=vehicle.user_id)
+                    for vehicle in vehicles
+                )
+        except IntegrityError:
+            # A concurrent signup took one of the values, find out which
+            self.insert_one_by_one(valid)
+        else:
+            self.created += len(users)
+
+    def build_user(self, row):
+        """Return an unsaved user and its raw password from a file row"""
+
+        if not isinstance(row, dict):
+            raise ValidationError('Invalid row: {}'.format(row))
+
+        manager = self.model.objects
+        user = self.model(
+            car_id=manager.normalize_car_id(row.get('car_id')),
+            email=manager.normalize_email(row.get('email')),
+            phone_number=(row.get('phone_number') or '').strip(),
+        )
+        # bulk_create skips save(), which keeps the plate in line and adds
+        # the vehicle and unread counter (see import_chunk)
+        user.plate = manager.normalize_plate(user.car_id)
+
+        errors = []
+        for field in UNIQUE_FIELDS:
+            value = getattr(user, field)
+            if value in self.seen[field]:
+                errors.append('{} appears twice in the file'.format(
+                    describe(user, field)
+                ))
+            self.seen[field].add(value)
+
+        try:
+            # Uniqueness is checked against the whole chunk at once
+            user.full_clean(exclude=['password'], validate_unique=False)
+        except ValidationError as exc:
+            errors.extend(
+                '{}: {}'.format(field, message)
+                for field, messages in exc.message_dict.items()
+                for message in messages
+            )
+
+        if errors:
+            raise ValidationError(errors)
+
+        return user, row.get('password') or None
+
+    def exclude_existing(self, valid):
+        """Report and drop the rows whose unique values are taken"""
+
+        query = Q()
+        for field in UNIQUE_FIELDS:
+            values = [getattr(user, field) for number, user, password in valid]
+            query |= Q(**{'{}__in'.format(COLUMNS[field]): values})
+
+        taken = {field: set() for field in UNIQUE_FIELDS}
+        columns = [COLUMNS[field] for field in UNIQUE_FIELDS]
+        for existing in self.model.objects.filter(query).values(*columns):
+            for field in UNIQUE_FIELDS:
+                taken[field].add(existing[COLUMNS[field]])
+
+        remaining = []
+        for number, user, password in valid:
+            fields = [
+                field for field in UNIQUE_FIELDS
+                if getattr(user, field) in taken[field]
+            ]
+            if fields:
+                self.report(number, ', '.join(
+                    '{} already exists'.format(describe(user, field))
+                    for field in fields
+                ))
+            else:
+                remaining.append((number, user, password))
+
+        return remaining
+
+    def insert_one_by_one(self, valid):
+        """Insert the rows of a conflicting chunk separately"""
+
+        for number, user, password in valid:
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError as exc:
+                self.report(number, str(exc))
+            else:
+                self.created += 1
@@ -1,31 +1,174 @@
 from django.contrib.auth import get_user_model, authenticate
+from django.db import transaction, IntegrityError
+from django.db.models import Q
 from rest_framework import serializers
 
+from core.models import Vehicle
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer of the user model"""
 
+    # Column checked for every unique field, a car id takes the plate of
+    # every vehicle
+    UNIQUE_COLUMNS = (
+        ('car_id', 'vehicles__plate'),
+        ('email', 'email'),
+        ('phone_number', 'phone_number'),
+    )
+
     class Meta:
         model = get_user_model()
         fields = ('car_id', 'email', 'phone_number', 'password')
-        extra_kwargs = {'password': {'write_only': True, 'min_length': 5}}
+        extra_kwargs = {
+            'password': {'write_only': True, 'min_length': 5},
+            # Checked together in validate() instead of a query per field
+            'car_id': {'validators': []},
+            'email': {'validators': []},
+            'phone_number': {'validators': []},
+        }
+
+    def validate_car_id(self, value):
+        """Validate that the car id has a plate"""
+
+        if not get_user_model().objects.normalize_plate(value):
+            msg = 'Enter a car id with letters or digits.'
+            raise serializers.ValidationError(msg)
+
+        return value
+
+    def validate_email(self, value):
+        """Normalize the email address the way it is stored"""
+
+        return get_user_model().objects.normalize_email(value)
+
+    def validate(self, attrs):
+        """Validate the unique fields with a single query"""
+
+        errors = self.find_conflicts(attrs)
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return attrs
+
+    def find_conflicts(self, attrs):
+        """Return the errors of the unique values other users have"""
+
+        manager = get_user_model().objects
+        values = {
+            column: attrs[field]
+            for field, column in self.UNIQUE_COLUMNS if field in attrs
+        }
+        if 'vehicles__plate' in values:
+            values['vehicles__plate'] = \
+                manager.normalize_plate(values['vehicles__plate'])
+        if not values:
+            return {}
+
+        query = Q()
+        for column, value in values.items():
+            query |= Q(**{column: value})
+        others = manager.filter(query)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+
+        errors = {}
+        for other in others.values(*values):
+            for field, column in self.UNIQUE_COLUMNS:
+                if column in values and other[column] == values[column]:
+                    errors[field] = [self.unique_message(field)]
+
+        return errors
+
+    def unique_message(self, field):
+        """Return the error of a unique field value another user has"""
+
+        if field == 'car_id':
+            return 'A user with this plate number already exists.'
+
+        return 'user with this {} already exists.'.format(
+            get_user_model()._meta.get_field(field).verbose_name
+        )
 
     def create(self, validated_data):
         """Create a new user and return"""
 
-        return get_user_model().objects.create_user(**validated_data)
+        try:
+            with transaction.atomic():
+                return get_user_model().objects.create_user(**validated_data)
+        except IntegrityError:
+            self.raise_conflicts(validated_data)
 
     def update(self, instance, validated_data):
         """Update a user, setting the password correctly and return"""
 
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
 
+        # Hash before the update so the user is saved only once
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
+
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            self.raise_conflicts(validated_data)
+
+    def raise_conflicts(self, attrs):
+        """Turn a value taken by a concurrent request into a 400"""
+
+        errors = self.find_conflicts(attrs)
+        if not errors:
+            raise
 
-        return user
+        raise serializers.ValidationError(errors)
+
+
+class VehicleSerializer(serializers.ModelSerializer):
+    """Serializer of the vehicles of a user"""
+
+    class Meta:
+        model = Vehicle
+        fields = ('car_id', 'plate', 'created_at')
+        read_only_fields = ('plate', 'created_at')
+
+    def validate_car_id(self, value):
+        """Validate that the car id has a plate no vehicle has"""
+
+        plate = get_user_model().objects.normalize_plate(value)
+        if not plate:
+            msg = 'Enter a car id with letters or digits.'
+            raise serializers.ValidationError(msg)
+
+        if Vehicle.objects.filter(plate=plate).exists():
+            raise serializers.ValidationError(self.unique_message())
+
+        return value
+
+    def unique_message(self):
+        """Return the error of a plate another vehicle has"""
+
+        return 'A vehicle with this plate number already exists.'
+
+    def create(self, validated_data):
+        """Create a vehicle, a plate taken meanwhile is a 400"""
+
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {'car_id': [self.unique_message()]}
+            )
+
+
+class PlateSearchSerializer(serializers.ModelSerializer):
+    """Serializer of the vehicles found by a plate search"""
+
+    class Meta:
+        model = Vehicle
+        fields = ('car_id', 'plate')
+        read_only_fields = fields
 
 
 class AuthTokenSerializer(serializers.Serializer):
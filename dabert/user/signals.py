@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_tokens
+
+
+def drop_snapshots(keys):
+    """Drop the token snapshots right away and again once committed
+
+    A request in between would otherwise cache the old row again, read
+    before the transaction is committed.
+    """
+
+    invalidate_tokens(*keys)
+    transaction.on_commit(lambda: invalidate_tokens(*keys))
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token_snapshot(sender, instance, **kwargs):
+    """Drop the cached snapshot of a rotated or deleted token"""
+
+    drop_snapshots([instance.key])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_token_snapshots(sender, instance, created, **kwargs):
+    """Drop the cached snapshots holding a stale copy of the user"""
+
+    if created:
+        return
+
+    drop_snapshots(list(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    ))
@@ -0,0 +1,139 @@
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from user.authentication import make_key
+
+
+ME_URL = reverse('user:me')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication"""
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        self.token = Token.objects.create(user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token {}'.format(self.token.key)
+        )
+
+    def test_authenticated_request_is_cached(self):
+        """Test that a cached token does not query the database"""
+
+        self.client.get(ME_URL)
+
+        # The user shown is loaded, the token is not looked up again
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['car_id'], self.user.car_id)
+
+    def test_snapshot_holds_no_password(self):
+        """Test that the cached snapshot keeps the ids only"""
+
+        self.client.get(ME_URL)
+
+        snapshot = cache.get(make_key(self.token.key))
+        self.assertEqual(snapshot, {
+            'user_id': self.user.pk,
+            'is_active': True,
+            'token_key': self.token.key,
+        })
+
+    def test_invalid_token_is_rejected(self):
+        """Test that an unknown token is not authenticated"""
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        """Test that deleting a token drops its cached snapshot"""
+
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test that deactivating a user drops its cached snapshots"""
+
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_is_refreshed(self):
+        """Test that an updated user is not served from a stale snapshot"""
+
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'email': "new@email.com"})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], "new@email.com")
+
+
+class TokenSnapshotCommitTests(TransactionTestCase):
+    """Test dropping the token snapshots once the change is committed"""
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        self.token = Token.objects.create(user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token {}'.format(self.token.key)
+        )
+
+    def test_snapshot_cached_before_commit_is_dropped(self):
+        """Test that a snapshot of the old row cached mid-transaction goes"""
+
+        with transaction.atomic():
+            self.user.is_active = False
+            self.user.save()
+            # Another request caches the row it still reads as active
+            cache.set(make_key(self.token.key), {
+                'user_id': self.user.pk,
+                'is_active': True,
+                'token_key': self.token.key,
+            })
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
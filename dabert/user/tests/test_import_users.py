@@ -0,0 +1,149 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Vehicle
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class ImportUsersCommandTests(TestCase):
+    """Test the bulk user import command"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_csv(self, *lines):
+        path = os.path.join(self.directory, 'users.csv')
+        with open(path, 'w') as f:
+            f.write('car_id,email,phone_number,password\n')
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def import_users(self, path, *args):
+        out = StringIO()
+        call_command('import_users', path, '--workers', '1', *args,
+                     stdout=out)
+        return out.getvalue()
+
+    def test_import_csv(self):
+        """Test that the rows of a CSV file are created as users"""
+
+        path = self.write_csv(
+            '111-111-111,one@email.com,0500000001,password1',
+            '222-222-222,TWO@Email.COM,0500000002,password2',
+        )
+
+        out = self.import_users(path)
+
+        self.assertIn('Imported 2 users, 0 rows with errors', out)
+        user = get_user_model().objects.get(car_id='222-222-222')
+        self.assertEqual(user.email, 'TWO@email.com')
+        self.assertTrue(user.check_password('password2'))
+
+    def test_import_jsonl(self):
+        """Test that the rows of a JSON lines file are created as users"""
+
+        path = os.path.join(self.directory, 'users.jsonl')
+        with open(path, 'w') as f:
+            f.write(json.dumps({
+                'car_id': '111-111-111',
+                'email': 'one@email.com',
+                'phone_number': '0500000001',
+                'password': 'password1',
+            }) + '\n')
+            f.write('not json\n')
+
+        out = self.import_users(path)
+
+        self.assertIn('Imported 1 users, 1 rows with errors', out)
+        self.assertIn('Line 2:', out)
+
+    def test_import_reports_invalid_rows(self):
+        """Test that every invalid row is reported with its line"""
+
+        create_user(
+            car_id='333-333-333',
+            email='taken@email.com',
+            phone_number='0500000003',
+            password='password'
+        )
+        path = self.write_csv(
+            '111-111-111,one@email.com,0500000001,password1',
+            '222-222-222,invalid_email,0500000002,password2',
+            '111-111-111,other@email.com,0500000004,password4',
+            '444-444-444,taken@email.com,0500000005,password5',
+            ',missing@email.com,0500000006,password6',
+        )
+
+        out = self.import_users(path)
+
+        self.assertIn('Imported 1 users, 4 rows with errors', out)
+        self.assertIn('Line 3: email', out)
+        self.assertIn('Line 4: car_id 111-111-111 appears twice', out)
+        self.assertIn('Line 5: email taken@email.com already exists', out)
+        self.assertIn('Line 6: car_id', out)
+        self.assertEqual(get_user_model().objects.count(), 2)
+
+    def test_import_checks_uniqueness_per_chunk(self):
+        """Test that a chunk runs one uniqueness query and bulk inserts"""
+
+        path = self.write_csv(*[
+            '{0}{0}{0},user{0}@email.com,050000000{0},password'.format(i)
+            for i in range(5)
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.import_users(path)
+
+        statements = [
+            query['sql'].split()[0] for query in queries
+            if 'SAVEPOINT' not in query['sql']
+        ]
+        # The users, their ids (returned by the insert on PostgreSQL),
+        # their vehicles and unread counters
+        self.assertEqual(statements,
+                         ['SELECT', 'INSERT', 'SELECT', 'INSERT', 'INSERT'])
+        self.assertEqual(get_user_model().objects.count(), 5)
+        self.assertEqual(Vehicle.objects.count(), 5)
+
+    def test_import_dry_run(self):
+        """Test that a dry run validates without creating users"""
+
+        path = self.write_csv(
+            '111-111-111,one@email.com,0500000001,password1',
+        )
+
+        with mock.patch('user.management.commands.import_users.'
+                        'make_password') as make_password:
+            out = self.import_users(path, '--dry-run')
+
+        self.assertIn('Validated 1 users, 0 rows with errors', out)
+        make_password.assert_not_called()
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_import_hashes_in_process_pool(self):
+        """Test that the passwords can be hashed by worker processes"""
+
+        path = self.write_csv(
+            '111-111-111,one@email.com,0500000001,password1',
+            '222-222-222,two@email.com,0500000002,password2',
+        )
+
+        call_command('import_users', path, '--workers', '2',
+                     stdout=StringIO())
+
+        user = get_user_model().objects.get(car_id='111-111-111')
+        self.assertTrue(user.check_password('password1'))
@@ -1,14 +1,29 @@
-from django.test import TestCase
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.models import Vehicle
+from user.serializers import UserSerializer
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
+SEARCH_URL = reverse('user:search')
+VEHICLES_URL = reverse('user:vehicles')
+
+
+def vehicle_url(car_id):
+    return reverse('user:vehicle', args=[car_id])
 
 
 def create_user(**params):
@@ -16,6 +31,102 @@ def create_user(**params):
 
 
 # Public tests
+class ThrottledUserApiTests(TestCase):
+    """Test the rate limits of the login and signup endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+
+    @override_settings(THROTTLING={'RATES': {'login_car_id': '2/m'}})
+    def test_login_throttled_per_car_id(self):
+        """Test that login attempts on a plate are limited"""
+
+        for password in ('wrong', 'wrong'):
+            res = self.client.post(TOKEN_URL, {
+                'car_id': "123-456-789", 'password': password
+            })
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # A differently formatted car id counts against the same plate
+        res = self.client.post(TOKEN_URL, {
+            'car_id': "123456789", 'password': 'password'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+    @override_settings(THROTTLING={'RATES': {'login_car_id': '2/m'}})
+    def test_login_success_not_counted_per_car_id(self):
+        """Test that successful logins do not lock a plate out"""
+
+        for _ in range(3):
+            res = self.client.post(TOKEN_URL, {
+                'car_id': "123-456-789", 'password': 'password'
+            })
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(THROTTLING={'RATES': {'signup': '1/h'}})
+    def test_signup_throttled_per_address(self):
+        """Test that signups from an address are limited"""
+
+        for i, expected in enumerate((status.HTTP_201_CREATED,
+                                      status.HTTP_429_TOO_MANY_REQUESTS)):
+            res = self.client.post(CREATE_USER_URL, {
+                'car_id': "111-111-11{}".format(i),
+                'email': "user{}@email.com".format(i),
+                'phone_number': "050000000{}".format(i),
+                'password': "password"
+            })
+            self.assertEqual(res.status_code, expected)
+
+
+class ConcurrentSignupTests(TransactionTestCase):
+    """Test signups of the same user racing each other"""
+
+    def test_concurrent_signup(self):
+        """Test that one signup wins and the others get a 400"""
+
+        payload = {
+            'car_id': "123-456-789",
+            'email': "test@email.com",
+            'phone_number': "0544444444",
+            'password': "password"
+        }
+        # A timeout so a thread failing before the barrier does not hang the
+        # others
+        barrier = threading.Barrier(4, timeout=10)
+        statuses = []
+
+        def signup():
+            try:
+                client = APIClient()
+                barrier.wait()
+                statuses.append(
+                    client.post(CREATE_USER_URL, payload).status_code
+                )
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=signup) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [status.HTTP_201_CREATED] +
+                         [status.HTTP_400_BAD_REQUEST] * 3)
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+
 class PublicUserApiTests(TestCase):
     """Test the users public API"""
 
@@ -68,6 +179,117 @@ class PublicUserApiTests(TestCase):
         # Check if the server is returning a bad request response
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_user_same_plate_exists(self):
+        """Test creating user with a differently formatted plate is failing"""
+
+        create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+
+        # Make the api create call with the same plate
+        res = self.client.post(CREATE_USER_URL, {
+            'car_id': "123 456 789",
+            'email': "other@email.com",
+            'phone_number': "0555555555",
+            'password': "password"
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('car_id', res.data)
+
+    def test_user_conflicts_reported_together(self):
+        """Test that every taken unique field is reported at once"""
+
+        create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+
+        res = self.client.post(CREATE_USER_URL, {
+            'car_id': "111-111-111",
+            'email': "test@EMAIL.com",
+            'phone_number': "0544444444",
+            'password': "password"
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {'email', 'phone_number'})
+
+    def test_create_user_single_uniqueness_query(self):
+        """Test that a signup checks the unique fields in one query"""
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(CREATE_USER_URL, {
+                'car_id': "123-456-789",
+                'email': "test@email.com",
+                'phone_number': "0544444444",
+                'password': "password"
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user_queries = [
+            query['sql'] for query in queries
+            if '"core_user"' in query['sql']
+        ]
+        self.assertEqual(len(user_queries), 2)
+        self.assertTrue(user_queries[0].startswith('SELECT'))
+        self.assertTrue(user_queries[1].startswith('INSERT'))
+
+    def test_create_user_vehicle_exists(self):
+        """Test that a car id another user has a vehicle with is a 400"""
+
+        user = create_user(
+            car_id="111-111-111",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+        Vehicle.objects.create(user=user, car_id="123-456-789")
+
+        res = self.client.post(CREATE_USER_URL, {
+            'car_id': "123 456 789",
+            'email': "test@email.com",
+            'phone_number': "0544444444",
+            'password': "password"
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), ['car_id'])
+
+    def test_create_user_race_lost(self):
+        """Test that a value taken after validation is a 400, not a 500"""
+
+        create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+        find_conflicts = UserSerializer.find_conflicts
+        calls = []
+
+        def race(serializer, attrs):
+            # The other signup commits right after this one validated
+            calls.append(attrs)
+            return {} if len(calls) == 1 else find_conflicts(serializer, attrs)
+
+        with mock.patch.object(UserSerializer, 'find_conflicts', race):
+            res = self.client.post(CREATE_USER_URL, {
+                'car_id': "123 456 789",
+                'email': "other@email.com",
+                'phone_number': "0555555555",
+                'password': "password"
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('car_id', res.data)
+        self.assertEqual(len(calls), 2)
+
     def test_password_too_short(self):
         """Test that the password must be more than 5 characters"""
 
@@ -217,6 +439,51 @@ class PrivateUserApiTests(TestCase):
             'phone_number': self.user.phone_number
         })
 
+    def test_search_plate(self):
+        """Test that users are found by a partial plate"""
+
+        create_user(
+            car_id="123-000-000",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+
+        # Make the search request
+        res = self.client.get(SEARCH_URL, {'q': '123-4'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'car_id': self.user.car_id, 'plate': self.user.plate}
+        ])
+
+    def test_retrieve_profile_not_modified(self):
+        """Test that an unchanged profile is answered with 304"""
+
+        cache.clear()
+        res = self.client.get(ME_URL)
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+        # Answered from the cached version alone
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_profile_modified(self):
+        """Test that an updated profile is returned in full again"""
+
+        cache.clear()
+        etag = self.client.get(ME_URL)['ETag']
+
+        self.client.patch(ME_URL, {'email': "test_new@email.com"})
+        res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], "test_new@email.com")
+        self.assertNotEqual(res['ETag'], etag)
+
     def test_post_me_not_allowed(self):
         """Test the posting in me is not allowed"""
 
@@ -249,3 +516,91 @@ class PrivateUserApiTests(TestCase):
         self.assertTrue(
             self.user.check_password(update_user_params['password'])
         )
+
+
+class VehicleApiTests(TestCase):
+    """Test managing the vehicles of the authenticated user"""
+
+    def setUp(self):
+        self.user = create_user(
+            car_id="123-456-789",
+            email="test@email.com",
+            phone_number="0544444444",
+            password="password"
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_vehicles(self):
+        """Test that the user's vehicles are listed in one query"""
+
+        Vehicle.objects.create(user=self.user, car_id="11-222-33")
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(VEHICLES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(v['car_id'], v['plate']) for v in res.data],
+            [("11-222-33", "1122233"), ("123-456-789", "123456789")]
+        )
+
+    def test_add_vehicle(self):
+        """Test adding a vehicle to the user"""
+
+        res = self.client.post(VEHICLES_URL, {'car_id': "11-222-33"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['plate'], "1122233")
+        self.assertTrue(
+            self.user.vehicles.filter(plate="1122233").exists()
+        )
+
+    def test_add_vehicle_taken(self):
+        """Test that a plate another user has cannot be added"""
+
+        create_user(
+            car_id="11-222-33",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+
+        res = self.client.post(VEHICLES_URL, {'car_id': "11 222 33"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.user.vehicles.count(), 1)
+
+    def test_remove_vehicle(self):
+        """Test removing a vehicle, whatever the car id formatting"""
+
+        Vehicle.objects.create(user=self.user, car_id="11-222-33")
+
+        res = self.client.delete(vehicle_url("11 222 33"))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.user.vehicles.count(), 1)
+
+    def test_remove_login_vehicle(self):
+        """Test that the vehicle of the login car id is kept"""
+
+        res = self.client.delete(vehicle_url(self.user.car_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.user.vehicles.count(), 1)
+
+    def test_remove_other_users_vehicle(self):
+        """Test that the vehicles of other users are not found"""
+
+        create_user(
+            car_id="11-222-33",
+            email="other@email.com",
+            phone_number="0555555555",
+            password="password"
+        )
+
+        res = self.client.delete(vehicle_url("11-222-33"))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
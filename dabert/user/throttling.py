@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+
+from core.throttling import AddressThrottle, FailureThrottle
+
+
+class SignupThrottle(AddressThrottle):
+    """Throttle the signups of a client address"""
+
+    scope = 'signup'
+
+
+class LoginThrottle(AddressThrottle):
+    """Throttle the login attempts of a client address"""
+
+    scope = 'login'
+
+
+class LoginCarIdThrottle(FailureThrottle):
+    """Throttle the failed login attempts on a car id, from any address
+
+    Only wrong passwords count, anyone may send the plate of another user
+    and a count of every attempt would lock its owner out.
+    """
+
+    scope = 'login_car_id'
+
+    def get_idents(self, request, view):
+        car_id = request.data.get('car_id')
+        if not isinstance(car_id, str):
+            return []
+
+        plate = get_user_model().objects.normalize_plate(car_id)
+        return [plate] if plate else []
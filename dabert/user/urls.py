@@ -9,4 +9,8 @@ urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
     path('me/', views.ManageUserView.as_view(), name='me'),
+    path('search/', views.SearchUserView.as_view(), name='search'),
+    path('vehicles/', views.VehicleListView.as_view(), name='vehicles'),
+    path('vehicles/<str:car_id>/', views.VehicleDetailView.as_view(),
+         name='vehicle'),
 ]
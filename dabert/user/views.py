@@ -1,33 +1,140 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, serializers
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
-from user.serializers import UserSerializer, AuthTokenSerializer
+from core.idempotency import IdempotentMixin
+from core.models import Vehicle
+from core.throttling import FailureThrottle
+from core.versions import ConditionalGetMixin
+from user.authentication import CachedTokenAuthentication
+from user.serializers import UserSerializer, AuthTokenSerializer, \
+                             PlateSearchSerializer, VehicleSerializer
+from user.throttling import SignupThrottle, LoginThrottle, LoginCarIdThrottle
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(IdempotentMixin, generics.CreateAPIView):
     """Create a new user in the system (Register)"""
 
     serializer_class = UserSerializer
+    throttle_classes = (SignupThrottle,)
+
+    def create(self, request, *args, **kwargs):
+        """Create the user, or replay the response of a retried signup"""
+
+        return self.idempotent(super().create, request, *args, **kwargs)
 
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user"""
 
     serializer_class = AuthTokenSerializer
+    # Every attempt costs a password hash
+    throttle_classes = (LoginThrottle, LoginCarIdThrottle)
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        """Create the token, counting the failed attempts on the car id"""
+
+        try:
+            return super().post(request, *args, **kwargs)
+        except serializers.ValidationError:
+            for throttle in self.get_throttles():
+                if isinstance(throttle, FailureThrottle):
+                    throttle.record_failure(request, self)
+            raise
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+
+class ManageUserView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
 
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         """Retrieve and return authenticated user"""
 
-        # When we declare 'authentication_classes' django automaticaly puts
-        # the logged in user instance into the request.
-        return self.request.user
+        # The authenticated user may come from a token snapshot with its
+        # fields deferred, the whole row is loaded before it is shown or
+        # written
+        return get_object_or_404(get_user_model(), pk=self.request.user.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve the user, or 304 when the client's copy is current"""
+
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class VehicleListView(ConditionalGetMixin, IdempotentMixin,
+                      generics.ListCreateAPIView):
+    """List and add the vehicles of the authenticated user"""
+
+    serializer_class = VehicleSerializer
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = None
+
+    def get_queryset(self):
+        """Return the user's vehicles, one range of the (user, plate) index"""
+
+        return self.request.user.vehicles.order_by('plate')
+
+    def perform_create(self, serializer):
+        """Add the vehicle to the authenticated user"""
+
+        serializer.save(user=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        """List the vehicles, or 304 when the client's copy is current"""
+
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        """Add the vehicle, or replay the response of a retried request"""
+
+        return self.idempotent(super().create, request, *args, **kwargs)
+
+
+class VehicleDetailView(generics.RetrieveDestroyAPIView):
+    """Retrieve or remove a vehicle of the authenticated user"""
+
+    serializer_class = VehicleSerializer
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_object(self):
+        """Return the user's vehicle of the plate, whatever its formatting"""
+
+        return get_object_or_404(
+            self.request.user.vehicles,
+            plate=get_user_model().objects.normalize_plate(
+                self.kwargs['car_id']
+            )
+        )
+
+    def perform_destroy(self, instance):
+        """Remove a vehicle other than the one the user logs in with"""
+
+        if instance.plate == self.request.user.plate:
+            msg = 'The vehicle you log in with cannot be removed.'
+            raise serializers.ValidationError({'car_id': [msg]})
+
+        instance.delete()
+
+
+class SearchUserView(generics.ListAPIView):
+    """Find the vehicles of a full, partial or mistyped plate number"""
+
+    serializer_class = PlateSearchSerializer
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = None
+
+    def get_queryset(self):
+        """Return the users matching the q parameter"""
+
+        return Vehicle.objects.search_plate(
+            self.request.query_params.get('q', '')
+        )
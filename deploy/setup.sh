@@ -11,7 +11,7 @@ PROJECT_MANAGE_PATH='/usr/local/apps/dabert-rest-api/dabert'
 
 echo "Installing dependencies..."
 apt-get update
-apt-get install -y python3-dev python3-venv sqlite python-pip supervisor nginx git
+apt-get install -y python3-dev python3-venv sqlite python-pip supervisor nginx git memcached redis-server
 
 # Create project directory
 mkdir -p $PROJECT_BASE_PATH
@@ -23,7 +23,6 @@ python3 -m venv $PROJECT_MANAGE_PATH/env
 
 # Install python packages
 $PROJECT_MANAGE_PATH/env/bin/pip install -r $PROJECT_BASE_PATH/requirements.txt
-$PROJECT_MANAGE_PATH/env/bin/pip install uwsgi==2.0.18
 
 # Run migrations and collectstatic
 cd $PROJECT_MANAGE_PATH
@@ -35,7 +34,11 @@ echo "Setting supervisor..."
 cp $PROJECT_BASE_PATH/deploy/supervisor_dabert_api.conf /etc/supervisor/conf.d/dabert_api.conf
 supervisorctl reread
 supervisorctl update
-supervisorctl restart dabert_api
+supervisorctl restart dabert_api dabert_asgi dabert_dispatch
+
+# Configure cron
+echo "Setting cron..."
+cp $PROJECT_BASE_PATH/deploy/cron_dabert_api /etc/cron.d/dabert_api
 
 # Configure nginx
 echo "Setting nginx..."
@@ -7,6 +7,6 @@ PROJECT_MANAGE_PATH='/usr/local/apps/dabert-rest-api/dabert'
 git pull
 $PROJECT_MANAGE_PATH/env/bin/python manage.py migrate
 $PROJECT_MANAGE_PATH/env/bin/python manage.py collectstatic --noinput
-supervisorctl restart dabert_api
+supervisorctl restart dabert_api dabert_asgi dabert_dispatch
 
 echo "DONE! :)"